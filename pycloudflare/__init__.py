@@ -1,4 +1,4 @@
 """Python client for CloudFlare."""
 
-__version__ = '4.1.0'
+__version__ = '5.0.0'
 __url__ = 'https://github.com/yola/pycloudflare'
@@ -0,0 +1,192 @@
+"""asyncio interface to the CloudFlare API.
+
+Requires Python 3.6+.
+
+The endpoint methods of :class:`pycloudflare.services.CloudFlareService` are
+exposed as coroutines, each request running on a shared thread pool. This
+allows many requests to be in flight from a single event loop, while keeping
+the error handling and ``post_send`` result unwrapping of the blocking client.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
+
+from demands.pagination import PAGE_SIZE
+
+from pycloudflare.models import PageRule, Record, RecordIndex, Zone
+from pycloudflare.pool import ConnectionPool
+from pycloudflare.services import CF_PAGINATION_OPTIONS, CloudFlareService
+
+DEFAULT_MAX_WORKERS = 100
+
+# Hooks of the service, rather than endpoints
+_HOOKS = frozenset([
+    'pre_send', 'is_acceptable', 'post_send', 'dump_cached', 'load_cached'])
+_ENDPOINTS = frozenset(
+    name for name, value in vars(CloudFlareService).items()
+    if callable(value) and not name.startswith('_') and name not in _HOOKS)
+
+
+async def async_paginated_results(fn, args=(), kwargs=None):
+    """Async counterpart of `cloudflare_paginated_results`.
+
+    `fn` is a coroutine function accepting `page` and `per_page` arguments.
+    """
+    kwargs = dict(kwargs or {})
+    per_page = CF_PAGINATION_OPTIONS[PAGE_SIZE]
+    page = 1
+    while True:
+        kwargs.update(page=page, per_page=per_page)
+        items = await fn(*args, **kwargs)
+        for item in items:
+            yield item
+        result_info = getattr(items, 'result_info', None) or {}
+        if page >= result_info.get('total_pages', page + 1):
+            return
+        if len(items) < per_page:
+            return
+        page += 1
+
+
+class AsyncCloudFlareService(object):
+    """Coroutine wrapper around a CloudFlareService.
+
+    Every endpoint method of CloudFlareService is available, returning an
+    awaitable for its result:
+
+        >>> service = AsyncCloudFlareService(api_key, email)
+        >>> zones = await service.get_zones()
+
+    An existing (blocking) service can be wrapped by passing `service`.
+    Its requests are then limited to the size of its connection pool, as
+    connections beyond it wouldn't be kept alive.
+    """
+
+    def __init__(self, api_key=None, email=None, service=None,
+                 max_workers=DEFAULT_MAX_WORKERS):
+        self._connection_pool = None
+        if service is None:
+            # Allow a keep-alive connection per worker
+            self._connection_pool = ConnectionPool(pool_size=max_workers)
+            service = CloudFlareService(
+                api_key, email, connection_pool=self._connection_pool)
+        pool = getattr(service, 'connection_pool', None)
+        if pool is not None:
+            max_workers = min(max_workers, pool.pool_size)
+        self.max_workers = max_workers
+        self._service = service
+        self._executor = ThreadPoolExecutor(max_workers)
+
+    def __getattr__(self, name):
+        if name not in _ENDPOINTS:
+            raise AttributeError(name)
+        method = getattr(self._service, name)
+
+        @wraps(method)
+        def _endpoint(*args, **kwargs):
+            return self.run(method, *args, **kwargs)
+
+        return _endpoint
+
+    def run(self, fn, *args, **kwargs):
+        """Run the blocking callable `fn` on the thread pool.
+
+        Useful for the blocking model methods, e.g. `Record.save`.
+        """
+        loop = asyncio.get_event_loop()
+        return loop.run_in_executor(
+            self._executor, partial(fn, *args, **kwargs))
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        if self._connection_pool is not None:
+            self._connection_pool.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+
+class AsyncUser(object):
+    """asyncio counterpart of the `User` zone lookups.
+
+    Yields `AsyncZone` objects, which wrap the regular `Zone` model.
+    Requests share the user's connection pool, so at most its `pool_size`
+    are in flight (see `configure_connection_pools`).
+    """
+
+    def __init__(self, user, max_workers=DEFAULT_MAX_WORKERS):
+        self.user = user
+        self._service = AsyncCloudFlareService(
+            service=user._service, max_workers=max_workers)
+
+    async def iter_zones(self, **filters):
+        async for zone in async_paginated_results(
+                self._service.get_zones, kwargs=filters):
+            yield AsyncZone(self, Zone(self.user, zone))
+
+    async def get_zones(self, **filters):
+        return [zone async for zone in self.iter_zones(**filters)]
+
+    async def get_zone_by_name(self, name):
+        zone = await self._service.get_zone_by_name(name)
+        return AsyncZone(self, Zone(self.user, zone))
+
+    def close(self):
+        self._service.close()
+
+    def __repr__(self):
+        return 'AsyncUser<%s>' % self.user.email
+
+
+class AsyncZone(object):
+
+    def __init__(self, user, zone):
+        self.user = user
+        self.zone = zone
+        self._service = user._service
+
+    def __getattr__(self, name):
+        # Only zone data is proxied, methods of Zone would block the loop
+        if name in self.zone._data:
+            return self.zone._data[name]
+        raise AttributeError(name)
+
+    async def iter_records(self):
+        async for record in async_paginated_results(
+                self._service.get_dns_records, args=(self.id,)):
+            yield Record(self.zone, record)
+
+    async def get_records(self):
+        """Return the zone's records by name, like `Zone.records`."""
+        return RecordIndex([record async for record in self.iter_records()])
+
+    async def create_record(self, *args, **kwargs):
+        return await self._service.run(
+            self.zone.create_record, *args, **kwargs)
+
+    async def iter_page_rules(self):
+        async for page_rule in async_paginated_results(
+                self._service.get_page_rules, args=(self.id,)):
+            yield PageRule(self.zone, page_rule)
+
+    async def purge_cache(self, files=None, tags=None, hosts=None):
+        await self._service.purge_cache(
+            self.id, files=files, tags=tags, hosts=hosts)
+
+    async def get_ssl_verification_info(self):
+        return await self._service.run(self.zone.get_ssl_verification_info)
+
+    async def re_verify(self):
+        """Coroutine version of `Zone.re_verify`."""
+        steps = self.zone._re_verify_steps()
+        while True:
+            delay = await self._service.run(next, steps, None)
+            if delay is None:
+                return
+            await asyncio.sleep(delay)
+
+    def __repr__(self):
+        return 'AsyncZone<%s>' % self.name
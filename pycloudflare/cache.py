@@ -0,0 +1,238 @@
+"""Caching of CloudFlareService read endpoints.
+
+A cache given to `CloudFlareService` keeps the results of GET requests to
+the endpoints in its `ttls`, for that many seconds. Writes made through the
+service invalidate the cached results of the zone they touch.
+"""
+import json
+import os
+import re
+import sqlite3
+from collections import OrderedDict
+from copy import deepcopy
+from hashlib import sha256
+from threading import Lock
+from time import time
+
+from six import iteritems
+from six.moves.urllib.parse import parse_qsl, urlencode
+
+# Endpoints, by the pattern of their paths
+ENDPOINTS = (
+    ('zones', re.compile(r'^zones$')),
+    ('zone', re.compile(r'^zones/[^/]+$')),
+    ('dns_records', re.compile(r'^zones/[^/]+/dns_records$')),
+    ('page_rules', re.compile(r'^zones/[^/]+/pagerules$')),
+    ('zone_settings', re.compile(r'^zones/[^/]+/settings$')),
+    ('zone_setting', re.compile(r'^zones/[^/]+/settings/[^/]+$')),
+    ('custom_hostnames', re.compile(r'^zones/[^/]+/custom_hostnames$')),
+)
+LISTING_TTLS = {
+    'zones': 300,
+    'dns_records': 300,
+    'page_rules': 300,
+    'zone_settings': 300,
+}
+# Lookups of single zones, by id or name, settings and custom hostnames
+LOOKUP_TTLS = {
+    'zones': 60,
+    'zone': 60,
+    'zone_setting': 60,
+    'custom_hostnames': 60,
+}
+
+
+def get_endpoint(path):
+    """Return the name of the endpoint of `path`, if known."""
+    for name, pattern in ENDPOINTS:
+        if pattern.match(path):
+            return name
+    return None
+
+
+def get_scope(path):
+    """Return the scope invalidated by writes to `path`: its zone."""
+    return '/'.join(path.split('/')[:2])
+
+
+class MemoryCache(object):
+    """Cache in memory, shared by the threads of a process.
+
+    Up to `max_entries` results are kept, evicting the least recently used.
+    `hits` and `misses` count the lookups.
+    """
+    def __init__(self, ttls=LOOKUP_TTLS, max_entries=1000):
+        self.ttls = dict(ttls)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] <= time():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            # Move to the end, as the most recently used
+            del self._entries[key]
+            self._entries[key] = entry
+        return deepcopy(entry[1])
+
+    def set(self, key, scope, value, ttl):
+        entry = (scope, deepcopy(value), time() + ttl)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, scope):
+        with self._lock:
+            for key, entry in list(iteritems(self._entries)):
+                if entry[0] == scope:
+                    del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def close(self):
+        pass
+
+
+class SQLiteCache(object):
+    """Persistent cache, in an SQLite database under `directory`.
+
+    The database can be shared by processes. Up to `max_entries` results
+    are kept, evicting the least recently used.
+    """
+    def __init__(self, directory, ttls=LISTING_TTLS, max_entries=10000):
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.ttls = dict(ttls)
+        self.max_entries = max_entries
+        self._lock = Lock()
+        self._db = sqlite3.connect(
+            os.path.join(directory, 'pycloudflare.sqlite'), timeout=30,
+            check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'key TEXT PRIMARY KEY, scope TEXT, value TEXT, '
+                'expires REAL, used REAL)')
+            self._db.execute(
+                'CREATE INDEX IF NOT EXISTS cache_scope ON cache (scope)')
+            self._db.execute(
+                'CREATE INDEX IF NOT EXISTS cache_used ON cache (used)')
+
+    def get(self, key):
+        now = time()
+        with self._lock, self._db:
+            row = self._db.execute(
+                'SELECT value, expires FROM cache WHERE key = ?',
+                (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._db.execute('DELETE FROM cache WHERE key = ?', (key,))
+                return None
+            self._db.execute(
+                'UPDATE cache SET used = ? WHERE key = ?', (now, key))
+        return json.loads(row[0])
+
+    def set(self, key, scope, value, ttl):
+        now = time()
+        with self._lock, self._db:
+            self._db.execute(
+                'INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?)',
+                (key, scope, json.dumps(value), now + ttl, now))
+            self._db.execute(
+                'DELETE FROM cache WHERE key IN (SELECT key FROM cache '
+                'ORDER BY used DESC LIMIT -1 OFFSET ?)', (self.max_entries,))
+
+    def invalidate(self, scope):
+        with self._lock, self._db:
+            self._db.execute('DELETE FROM cache WHERE scope = ?', (scope,))
+
+    def clear(self):
+        with self._lock, self._db:
+            self._db.execute('DELETE FROM cache')
+
+    def close(self):
+        self._db.close()
+
+
+class CachingServiceMixin(object):
+    """Cache the GET requests of a CloudFlareService in its `cache`.
+
+    Results are cached per credentials, `cache_namespace`.
+    """
+    cache = None
+    cache_namespace = ''
+
+    def request(self, method, path, **kwargs):
+        send = super(CachingServiceMixin, self).request
+        if self.cache is None:
+            return send(method, path, **kwargs)
+
+        path, _, query = path.partition('?')
+        scope = '%s:%s' % (self.cache_namespace, get_scope(path))
+        if method.upper() != 'GET':
+            try:
+                return send(method, _join_query(path, query), **kwargs)
+            finally:
+                # Only once the write is done, or a concurrent read could
+                # cache the data it replaces
+                self.cache.invalidate(scope)
+                if re.match(r'^zones(/[^/]+)?$', path):
+                    # A zone was created, deleted or changed
+                    self.invalidate_zones()
+
+        ttl = self.cache.ttls.get(get_endpoint(path))
+        if ttl is None:
+            return send(method, _join_query(path, query), **kwargs)
+        key = '%s:%s?%s' % (
+            self.cache_namespace, path, _cache_query(query, kwargs))
+        cached = self.cache.get(key)
+        if cached is not None:
+            return self.load_cached(cached)
+        result = send(method, _join_query(path, query), **kwargs)
+        self.cache.set(key, scope, self.dump_cached(result), ttl)
+        return result
+
+    def invalidate_zones(self):
+        """Forget the cached zone listings and lookups by name.
+
+        For zones changed without this service, e.g. through the Host API.
+        """
+        if self.cache is not None:
+            self.cache.invalidate('%s:zones' % self.cache_namespace)
+
+    def dump_cached(self, result):
+        """Return `result` as JSON-serializable data."""
+        return {'result': result}
+
+    def load_cached(self, data):
+        return data['result']
+
+
+def cache_namespace(*credentials):
+    """Return a cache namespace for `credentials`, not revealing them."""
+    return sha256(':'.join(credentials).encode('utf-8')).hexdigest()
+
+
+def _join_query(path, query):
+    return path + '?' + query if query else path
+
+
+def _cache_query(query, kwargs):
+    params = parse_qsl(query)
+    params.extend((key, str(value))
+                  for key, value in iteritems(kwargs.get('params') or {}))
+    return urlencode(sorted(params))
@@ -11,3 +11,7 @@ class CustomHostnameNotFound(Exception):
 
 class AccountNotFound(Exception):
     pass
+
+
+class RecordNotFound(Exception):
+    pass
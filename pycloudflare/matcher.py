@@ -0,0 +1,98 @@
+"""Matching of URLs against a zone's page rules, on the client side.
+
+Only the `url` targets with the `matches` operator, as created with
+`Zone.create_page_rule(url_matches=...)`, are supported. In their patterns,
+`*` matches any characters. Patterns without a scheme match any scheme.
+"""
+import re
+
+from six.moves.urllib.parse import urlsplit
+
+
+class PageRuleMatcher(object):
+    """Find the page rules applying to URLs.
+
+    Patterns are compiled once, and rules for a literal host are indexed by
+    host, so each URL is only tested against its candidate rules. Disabled
+    rules are ignored, unless `include_disabled`.
+    """
+    def __init__(self, page_rules, include_disabled=False):
+        self._by_host = {}
+        self._any_host = []
+        # CloudFlare applies the rule with the highest priority
+        ordered = sorted(page_rules, key=lambda pr: -pr.priority)
+        for order, page_rule in enumerate(ordered):
+            if page_rule.status != 'active' and not include_disabled:
+                continue
+            for target in page_rule.targets:
+                constraint = target.get('constraint', {})
+                if (target.get('target') != 'url' or
+                        constraint.get('operator') != 'matches'):
+                    continue
+                self._add(order, page_rule, constraint['value'])
+        self._candidates = {}
+
+    def _add(self, order, page_rule, pattern):
+        has_scheme, host, regex = _compile(pattern)
+        rule = (order, has_scheme, regex, page_rule)
+        if host is None:
+            self._any_host.append(rule)
+        else:
+            self._by_host.setdefault(host, []).append(rule)
+
+    def _get_candidates(self, host):
+        if host not in self._candidates:
+            self._candidates[host] = sorted(
+                self._by_host.get(host, []) + self._any_host,
+                key=lambda rule: rule[0])
+        return self._candidates[host]
+
+    def match_all(self, url):
+        """Return the page rules matching `url`, by descending priority."""
+        scheme, host, rest = _split_url(url)
+        matches = []
+        for _, has_scheme, regex, page_rule in self._get_candidates(host):
+            text = host + rest
+            if has_scheme:
+                text = scheme + '://' + text
+            if regex.match(text) and page_rule not in matches:
+                matches.append(page_rule)
+        return matches
+
+    def match(self, url):
+        """Return the page rule applying to `url`, or None."""
+        matches = self.match_all(url)
+        return matches[0] if matches else None
+
+    def match_many(self, urls):
+        """Yield `(url, page_rule)` for `urls`, like `match`."""
+        for url in urls:
+            yield url, self.match(url)
+
+
+def _compile(pattern):
+    """Return whether `pattern` has a scheme, its literal host, and regex."""
+    has_scheme = '://' in pattern
+    scheme = ''
+    rest = pattern
+    if has_scheme:
+        scheme, rest = pattern.split('://', 1)
+        scheme = scheme.lower() + '://'
+    host, slash, path = rest.partition('/')
+    host = host.lower()
+    if not slash and not host.endswith('*'):
+        # A pattern without a path, e.g. `example.com`, is the root path
+        slash = '/'
+    regex = re.compile('^%s$' % '.*'.join(
+        re.escape(part) for part in (scheme + host + slash + path).split('*')))
+    return has_scheme, None if '*' in host else host, regex
+
+
+def _split_url(url):
+    if '://' not in url:
+        url = 'http://' + url
+    parts = urlsplit(url)
+    rest = parts.path or '/'
+    if parts.query:
+        rest += '?' + parts.query
+    return parts.scheme.lower(), parts.netloc.lower(), rest
@@ -1,17 +1,46 @@
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from copy import deepcopy
-from time import sleep
+from hashlib import sha1
+from heapq import heappop, heappush
+from threading import Lock
+from time import sleep, time
 
 from property_caching import (
-    cached_property, clear_property_cache, set_property_cache)
+    cached_property, clear_property_cache, is_property_cached,
+    set_property_cache)
 from six import iteritems, itervalues
 
-from pycloudflare.exceptions import AccountNotFound, SSLUnavailable
+from pycloudflare.exceptions import (
+    AccountNotFound, RecordNotFound, SSLUnavailable)
+from pycloudflare.matcher import PageRuleMatcher
 from pycloudflare.services import (
-    CloudFlareHostService, CloudFlareService, cloudflare_paginated_results)
-from pycloudflare.utils import translate_errors
+    CloudFlareHostService, CloudFlareService, HTTPServiceError,
+    cloudflare_paginated_results)
+from pycloudflare.utils import _translate_error, translate_errors
+
+DEFAULT_MAX_WORKERS = 8
+
+RecordChangeResult = namedtuple(
+    'RecordChangeResult', ('change', 'record', 'error'))
+PageRuleChangeResult = namedtuple(
+    'PageRuleChangeResult', ('change', 'page_rule', 'error'))
+ZoneResult = namedtuple('ZoneResult', ('zone_id', 'result', 'error'))
+RolloutResult = namedtuple(
+    'RolloutResult', ('zone_id', 'status', 'changes', 'error'))
+
+COMPLIANT = 'compliant'
+UPDATED = 'updated'
+SKIPPED = 'skipped'
+FAILED = 'failed'
+
+_host_service_lock = Lock()
 
 
 class User(object):
+    _host_service = None
+    # Extra CloudFlareService arguments, e.g. a cache or a rate_limiter
+    service_options = {}
 
     def __init__(self, email, api_key):
         self.email = email
@@ -19,11 +48,15 @@ class User(object):
 
     @classmethod
     def get_host_service(cls):
-        return CloudFlareHostService()
+        # Shared, to read the configuration and connect only once
+        with _host_service_lock:
+            if cls._host_service is None:
+                cls._host_service = CloudFlareHostService()
+            return cls._host_service
 
     @classmethod
     def get_service(cls, api_key, email):
-        return CloudFlareService(api_key, email)
+        return CloudFlareService(api_key, email, **cls.service_options)
 
     @classmethod
     def get_or_create(cls, email, password, username=None, unique_id=None):
@@ -56,10 +89,21 @@ class User(object):
     def zones(self):
         return list(self.iter_zones())
 
-    def iter_zones(self):
-        for zone in cloudflare_paginated_results(self._service.get_zones):
+    def iter_zones(self, max_workers=None, per_page=None, **filters):
+        """Iterate over the zones, matching the `get_zones` `filters`."""
+        for zone in cloudflare_paginated_results(
+                self._service.get_zones, kwargs=filters,
+                max_workers=max_workers, per_page=per_page):
             yield Zone(self, zone)
 
+    def count_zones(self, **filters):
+        return cloudflare_paginated_results(
+            self._service.get_zones, kwargs=filters).total_count()
+
+    def get_zone(self, zone_id):
+        """Return the zone with id `zone_id`, requested lazily."""
+        return Zone.from_id(self, zone_id)
+
     def get_zone_by_name(self, name):
         zone = self._service.get_zone_by_name(name)
         return Zone(self, zone)
@@ -67,6 +111,8 @@ class User(object):
     def create_host_zone(self, name, jump_start=False):
         host_service = self.get_host_service()
         host_service.full_zone_set(name, self.user_key, jump_start)
+        # The zone may have been looked up, and cached as not found
+        self._service.invalidate_zones()
         zone = self.get_zone_by_name(name)
 
         # Zone created by using Host API contains some garbage records.
@@ -80,6 +126,7 @@ class User(object):
         host_service = self.get_host_service()
         result = host_service.zone_set(
             zone_name, self.user_key, subdomains, resolve_to)
+        self._service.invalidate_zones()
         return result
 
     def create_account_and_zone(self, account_name, zone_name):
@@ -90,6 +137,38 @@ class User(object):
         zone = self._service.create_zone(name, account_id)
         return Zone(self, zone)
 
+    def purge_cache_many(self, zones, files=None, tags=None, hosts=None,
+                         max_workers=DEFAULT_MAX_WORKERS, rate_limiter=None):
+        """Purge the cache of `zones` (Zones or ids), concurrently.
+
+        Everything is purged if nothing is specified. Requests wait for
+        `rate_limiter`, if given, besides the service's own.
+
+        Returns a `ZoneResult` by zone id.
+        """
+        def purge(zone_id):
+            if rate_limiter is not None:
+                rate_limiter.acquire()
+            return self._service.purge_cache(
+                zone_id, files=files, tags=tags, hosts=hosts)
+
+        return _map_zones(purge, zones, max_workers)
+
+    def iter_ssl_verification_info(self, zones,
+                                   max_workers=DEFAULT_MAX_WORKERS):
+        """Fetch the SSL verification info of `zones`, concurrently.
+
+        Yields a `ZoneResult` per zone (Zone or id), as they arrive. Zones
+        that can't be verified any more have an `SSLUnavailable` error.
+        """
+        def get_info(zone_id):
+            try:
+                return self._service.get_ssl_verification_info(zone_id)
+            except HTTPServiceError as exc:
+                _translate_error(exc, 1001, SSLUnavailable)
+
+        return _iter_zone_results(get_info, zones, max_workers)
+
     def get_or_create_account(self, account_name):
         try:
             return self._service.get_account_by_name(account_name)
@@ -102,16 +181,45 @@ class User(object):
 
 class Zone(object):
 
-    def __init__(self, user, data):
+    def __init__(self, user, data, lazy=False):
+        """
+        A `lazy` zone only has some of its `data`, e.g. its id. The rest is
+        requested when first needed.
+        """
         self.user = user
         self._service = user._service
         self._data = data
+        self._lazy = lazy
+
+    @classmethod
+    def from_id(cls, user, zone_id):
+        """Return the zone with id `zone_id`, without requesting it."""
+        return cls(user, {'id': zone_id}, lazy=True)
+
+    @classmethod
+    def from_name(cls, user, name):
+        """Return the zone named `name`, requested once its id is needed."""
+        return cls(user, {'name': name}, lazy=True)
 
     def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
         if name in self._data:
             return self._data[name]
+        if self._lazy:
+            self._hydrate()
+            if name in self._data:
+                return self._data[name]
         raise AttributeError()
 
+    def _hydrate(self):
+        if 'id' in self._data:
+            data = self._service.get_zone(self._data['id'])
+        else:
+            data = self._service.get_zone_by_name(self._data['name'])
+        self._data.update(data)
+        self._lazy = False
+
     def delete(self):
         self._service.delete_zone(self.id)
         clear_property_cache(self.user, 'zones')
@@ -120,58 +228,194 @@ class Zone(object):
     def settings(self):
         return ZoneSettings(self)
 
-    def iter_records(self):
+    def iter_records(self, max_workers=None):
+        for record in cloudflare_paginated_results(
+                self._service.get_dns_records, args=(self.id,),
+                max_workers=max_workers):
+            yield Record(self, record)
+
+    def count_records(self, **filters):
+        return cloudflare_paginated_results(
+            self._service.get_dns_records, args=(self.id,),
+            kwargs=filters).total_count()
+
+    def find_records(self, name=None, record_type=None, content=None,
+                     proxied=None, **filters):
+        """Iterate over the records matching the filters, on the server.
+
+        Other `get_dns_records` filters can be given too.
+        """
+        filters.update(name=name, record_type=record_type, content=content,
+                       proxied=proxied)
         for record in cloudflare_paginated_results(
-                self._service.get_dns_records, args=(self.id,)):
+                self._service.get_dns_records, args=(self.id,),
+                kwargs=filters):
             yield Record(self, record)
 
+    def get_records_by_name(self, name):
+        """Return the records named `name`, sorted like `records`.
+
+        Unless `records` are already loaded, only these are requested.
+        """
+        if is_property_cached(self, 'records'):
+            return list(self.records.get(name, ()))
+        return sorted(self.find_records(name=name), key=_record_sort_key)
+
     @cached_property
     def records(self):
-        by_name = {}
-        for record in self.iter_records():
-            by_name.setdefault(record.name, []).append(record)
-        for value in itervalues(by_name):
-            value.sort(key=lambda r: (r.type, r.content))
-        return by_name
+        return RecordIndex(self.iter_records())
+
+    def get_record(self, record_id):
+        """Return the record with id `record_id`, from `records`."""
+        try:
+            return self.records.by_id[record_id]
+        except KeyError:
+            raise RecordNotFound()
+
+    def get_records_by_type(self, record_type):
+        """Return the records of type `record_type`, from `records`."""
+        return self.records.get_by_type(record_type)
+
+    def _index_record(self, record):
+        """Add `record` to the cached `records`, if they are loaded."""
+        if is_property_cached(self, 'records'):
+            self.records.add(record)
+
+    def _unindex_record(self, record):
+        """Remove `record` from the cached `records`, if they are loaded."""
+        if is_property_cached(self, 'records'):
+            self.records.remove(record)
 
     def create_record(self, name, record_type, content=None, ttl=1,
                       proxied=False, **kwargs):
-        data = {
-            'name': name,
-            'type': record_type,
-            'ttl': ttl,
-            'proxied': proxied,
-        }
+        data = _record_data(
+            name, record_type, content, ttl, proxied, **kwargs)
+        record = Record(self, self._service.create_dns_record(self.id, data))
+        self._index_record(record)
+        return record
+
+    def apply_records(self, changes, max_workers=DEFAULT_MAX_WORKERS):
+        """Apply a batch of record changes, concurrently.
+
+        `changes` are tuples, one of:
+
+        * `('create', kwargs)`, with the `create_record` arguments.
+        * `('update', record, {attribute: value})`
+        * `('delete', record)`
+
+        Returns a `RecordChangeResult` per change, in order, holding the
+        created or updated record, or the exception raised by the change.
+        The cached `records` are updated, rather than invalidated.
+        """
+        changes = list(changes)
+        executor = ThreadPoolExecutor(max_workers)
+        try:
+            futures = [executor.submit(self._apply_record_change, change)
+                       for change in changes]
+            results = []
+            for change, future in zip(changes, futures):
+                try:
+                    record = future.result()
+                except Exception as exc:
+                    results.append(RecordChangeResult(change, None, exc))
+                    continue
+                if change[0] == 'delete':
+                    self._unindex_record(record)
+                else:
+                    self._index_record(record)
+                results.append(RecordChangeResult(change, record, None))
+            return results
+        finally:
+            executor.shutdown(wait=True)
+
+    def sync_records(self, desired, dry_run=False,
+                     max_workers=DEFAULT_MAX_WORKERS):
+        """Make the zone's records match `desired`, with minimal changes.
+
+        `desired` is a list of record dicts, in the API format (`name`,
+        `type`, `content`, and optionally `ttl`, `proxied`, `priority` and
+        `data`). Only the fields given are compared. Records with the same
+        name and type, but different content, are updated in place rather
+        than deleted and re-created.
+
+        Returns the plan, a list of `apply_records` changes, if `dry_run`.
+        Otherwise, the plan is applied, deletions first, and its results
+        returned.
+        """
+        plan = self._plan_records_sync(desired)
+        if dry_run:
+            return plan
+        deletes = [change for change in plan if change[0] == 'delete']
+        others = [change for change in plan if change[0] != 'delete']
+        return (self.apply_records(deletes, max_workers) +
+                self.apply_records(others, max_workers))
+
+    def _plan_records_sync(self, desired):
+        current = {}
+        for records in itervalues(self.records):
+            for record in records:
+                current.setdefault((record.name, record.type), []).append(
+                    record)
+        wanted = {}
+        for data in desired:
+            wanted.setdefault((data['name'], data['type']), []).append(data)
+
+        deletes, updates, creates = [], [], []
+        for key in sorted(set(current) | set(wanted)):
+            records = list(current.get(key, ()))
+            unmatched = []
+            for data in wanted.get(key, ()):
+                record = _pop_record_by_content(records, data.get('content'))
+                if record is None:
+                    unmatched.append(data)
+                    continue
+                changes = _record_changes(record, data)
+                if changes:
+                    updates.append(('update', record, changes))
+            for record, data in zip(records, unmatched):
+                changes = _record_changes(record, data)
+                if changes:
+                    updates.append(('update', record, changes))
+            for record in records[len(unmatched):]:
+                deletes.append(('delete', record))
+            for data in unmatched[len(records):]:
+                creates.append(('create', _create_record_kwargs(data)))
+        return deletes + updates + creates
+
+    def _apply_record_change(self, change):
+        """Apply `change`, returning the record."""
+        action = change[0]
+        if action == 'create':
+            data = _record_data(**change[1])
+            return Record(self, self._service.create_dns_record(
+                self.id, data))
+        record = change[1]
+        if action == 'update':
+            # The record is left untouched until the update succeeds
+            changes = record._changes()
+            changes.update(change[2])
+            record._set_data(self._service.update_dns_record(
+                self.id, record.id, changes))
+        elif action == 'delete':
+            self._service.delete_dns_record(self.id, record.id)
+        else:
+            raise ValueError('Unknown record change: %s' % action)
+        return record
 
-        if content:
-            data['content'] = content
-
-        if record_type == 'MX':
-            data['priority'] = kwargs['priority']
-        elif record_type == 'SRV':
-            data['data'] = {
-                'name': name,
-                'service': kwargs['service'],
-                'proto': kwargs['protocol'],
-                'priority': kwargs['priority'],
-                'weight': kwargs['weight'],
-                'port': kwargs['port'],
-                'target': kwargs['target'],
-            }
-
-        record = self._service.create_dns_record(self.id, data)
-        clear_property_cache(self, 'records')
-        return Record(self, record)
-
-    def iter_page_rules(self):
+    def iter_page_rules(self, max_workers=None):
         for page_rule in cloudflare_paginated_results(
-                self._service.get_page_rules, args=(self.id,)):
+                self._service.get_page_rules, args=(self.id,),
+                max_workers=max_workers):
             yield PageRule(self, page_rule)
 
     @cached_property
     def page_rules(self):
         return sorted(self.iter_page_rules(), key=lambda pr: pr.priority)
 
+    def get_page_rule_matcher(self, include_disabled=False):
+        """Return a `PageRuleMatcher` for the zone's `page_rules`."""
+        return PageRuleMatcher(self.page_rules, include_disabled)
+
     def create_page_rule(self, targets=None, url_matches=None, actions=(),
                          priority=1, status='active'):
         """
@@ -181,28 +425,103 @@ class Zone(object):
         used to generate the targets parameter.
         The other parameters map directly to the CF API.
         """
-        if url_matches:
-            if targets:
-                raise ValueError(
-                    'Only one of targets and url_matches can be specified')
-            targets = [{
-                'target': 'url',
-                'constraint': {
-                    'operator': 'matches',
-                    'value': url_matches,
-                },
-            }]
-        data = {
-            'targets': targets,
-            'actions': actions,
-            'priority': priority,
-            'status': status,
-        }
+        data = _page_rule_data(targets, url_matches, actions, priority,
+                               status)
         page_rule = self._service.create_page_rule(self.id, data)
         clear_property_cache(self, 'page_rules')
         return PageRule(self, page_rule)
 
-    def purge_cache(self, files=None, tags=None, hosts=None):
+    def sync_page_rules(self, desired, dry_run=False):
+        """Make the zone's page rules match `desired`, with minimal changes.
+
+        `desired` is a list of page rule dicts, in the API format
+        (`targets`, `actions`, and optionally `priority` and `status`), by
+        ascending priority, like `page_rules`. If every rule has a
+        `priority`, they are ordered by it instead. Only this order is
+        kept: the rules already in order keep their priority where
+        possible, and only the others are given a new one.
+
+        Rules are matched by their targets, or else by their actions, and
+        only the fields that differ are updated.
+
+        Returns the plan, a list of `('create', data)`,
+        `('update', page_rule, changes)` and `('delete', page_rule)`
+        changes, if `dry_run`. Otherwise, the plan is applied, the cached
+        `page_rules` are updated in place, and a `PageRuleChangeResult` per
+        change is returned.
+        """
+        plan = self._plan_page_rules_sync(desired)
+        if dry_run:
+            return plan
+        results = [self._apply_page_rule_change(change) for change in plan]
+        if is_property_cached(self, 'page_rules'):
+            page_rules = self.page_rules
+            for result in results:
+                if result.error is not None:
+                    continue
+                if result.change[0] == 'delete':
+                    page_rules.remove(result.page_rule)
+                elif result.change[0] == 'create':
+                    page_rules.append(result.page_rule)
+            page_rules.sort(key=lambda pr: pr.priority)
+        return results
+
+    def _plan_page_rules_sync(self, desired):
+        if all('priority' in data for data in desired):
+            desired = sorted(desired, key=lambda data: data['priority'])
+        current = list(self.page_rules)
+        matched = [_pop_page_rule(current, 'targets', data['targets'])
+                   for data in desired]
+        for i, data in enumerate(desired):
+            if matched[i] is None:
+                matched[i] = _pop_page_rule(
+                    current, 'actions', data['actions'])
+        priorities = _page_rule_priorities(
+            [page_rule and page_rule.priority for page_rule in matched])
+
+        updates = []
+        creates = []
+        for data, page_rule, priority in zip(desired, matched, priorities):
+            data = dict(data, priority=priority)
+            if page_rule is None:
+                creates.append(('create', data))
+                continue
+            changes = _page_rule_changes(page_rule, data)
+            if changes:
+                updates.append(('update', page_rule, changes))
+        deletes = [('delete', page_rule) for page_rule in current]
+        return deletes + updates + creates
+
+    def _apply_page_rule_change(self, change):
+        action = change[0]
+        try:
+            if action == 'create':
+                data = dict(
+                    (field, value) for field, value in iteritems(change[1])
+                    if field in _SYNCED_PAGE_RULE_FIELDS)
+                page_rule = PageRule(self, self._service.create_page_rule(
+                    self.id, _page_rule_data(**data)))
+            elif action == 'update':
+                page_rule = change[1]
+                page_rule._set_data(self._service.update_page_rule(
+                    self.id, page_rule.id, change[2]))
+            elif action == 'delete':
+                page_rule = change[1]
+                self._service.delete_page_rule(self.id, page_rule.id)
+            else:
+                raise ValueError('Unknown page rule change: %s' % action)
+        except Exception as exc:
+            return PageRuleChangeResult(change, None, exc)
+        return PageRuleChangeResult(change, page_rule, None)
+
+    def purge_cache(self, files=None, tags=None, hosts=None, queue=None):
+        """Purge the zone's cache, everything if nothing is specified.
+
+        With a `PurgeQueue`, the purge is coalesced with others, and a
+        Future is returned.
+        """
+        if queue is not None:
+            return queue.purge(self.id, files=files, tags=tags, hosts=hosts)
         self._service.purge_cache(
             self.id, files=files, tags=tags, hosts=hosts)
 
@@ -215,50 +534,92 @@ class Zone(object):
 
         This will leave SSL enabled, regardless of the previous state.
         """
+        for delay in self._re_verify_steps():
+            sleep(delay)
+
+    def _re_verify_steps(self):
+        """Re-verify, yielding the seconds to wait between requests.
+
+        This lets schedulers wait without blocking a thread per zone.
+        """
         self._service.update_ssl_universal_settings(
             self.id, {'enabled': False})
         # This is asynchronous on CF's side. So probe until it seems to have
         # been deprovisioned, and then wait a little longer to be safe.
         for i in range(5):
-            sleep(1)
+            yield 1
             try:
                 self.get_ssl_verification_info()
             except SSLUnavailable:
-                sleep(1)
+                yield 1
                 break
 
         self._service.update_ssl_universal_settings(
             self.id, {'enabled': True})
 
     def __repr__(self):
-        return 'Zone<%s>' % self.name
+        return 'Zone<%s>' % self._data.get('name', self._data.get('id'))
 
 
 class ZoneSettings(object):
-    def __init__(self, zone):
+    """The settings of a zone.
+
+    Settings are requested one by one, as they are used, and all at once
+    only when iterating.
+    """
+    _own_attrs = ('zone', '_service', '_settings', '_updates', '_complete')
+
+    def __init__(self, zone, settings=None):
+        """
+        `settings` are the zone's settings, if already fetched.
+        """
         self.zone = zone
         self._service = zone._service
-        self._get_settings()
+        self._settings = {}
         self._updates = {}
+        self._complete = False
+        if settings is not None:
+            self._set_settings(settings, complete=True)
 
-    def _get_settings(self):
-        self._settings = {}
-        for setting in self._service.get_zone_settings(self.zone.id):
+    def _set_settings(self, settings, complete=False):
+        for setting in settings:
             self._settings[setting['id']] = setting
+        self._complete = self._complete or complete
+
+    def _get_settings(self):
+        self._set_settings(
+            self._service.get_zone_settings(self.zone.id), complete=True)
+
+    def _get_setting(self, name):
+        """Return the setting `name`, requesting it if needed."""
+        if name not in self._settings and not self._complete:
+            try:
+                setting = self._service.get_zone_setting(self.zone.id, name)
+            except HTTPServiceError as exc:
+                if exc.response.status_code not in (400, 404):
+                    raise
+                # Remembered as unknown, not to request it again
+                setting = None
+            self._settings[name] = setting
+        return self._settings.get(name)
 
     def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
         if name in self._updates:
             return self._updates[name]
-        if name in self._settings:
-            return self._settings[name]['value']
-        raise AttributeError()
+        setting = self._get_setting(name)
+        if setting is None:
+            raise AttributeError()
+        return setting['value']
 
     def __setattr__(self, name, value):
-        if name in ('zone', '_service', '_settings', '_updates'):
+        if name in self._own_attrs:
             return super(ZoneSettings, self).__setattr__(name, value)
-        if name not in self._settings:
+        setting = self._get_setting(name)
+        if setting is None:
             raise AttributeError('Not a valid setting')
-        if not self._settings[name]['editable']:
+        if not setting['editable']:
             raise ValueError('Not an editeable setting')
         self._updates[name] = value
 
@@ -267,20 +628,28 @@ class ZoneSettings(object):
             return
         items = [{'id': name, 'value': value}
                  for name, value in iteritems(self._updates)]
-        self._service.set_zone_settings(self.zone.id, items)
-        self._get_settings()
+        self._set_settings(
+            self._service.set_zone_settings(self.zone.id, items))
         self._updates = {}
 
     def __iter__(self):
-        return iter(sorted(self._settings))
+        if not self._complete:
+            self._get_settings()
+        return iter(sorted(name for name, setting in iteritems(self._settings)
+                           if setting is not None))
 
     def __repr__(self):
         return 'ZoneSettings<%s>' % self.zone.name
 
 
 class PerZoneObject(object):
-    _data = ()
-    _own_attrs = ('zone', '_service', '_data', '_saved_data')
+    """An object of a zone, e.g. a DNS record.
+
+    Its data is stored once. To detect changes, only the original values of
+    the attributes that were assigned, or read and could be changed in
+    place, are kept.
+    """
+    __slots__ = ('zone', '_service', '_data', '_originals')
 
     def __init__(self, zone, data):
         self.zone = zone
@@ -288,30 +657,46 @@ class PerZoneObject(object):
         self._set_data(data)
 
     def __getattr__(self, name):
-        if name in self._data:
-            return self._data[name]
-        raise AttributeError()
+        if name.startswith('_') or name not in self._data:
+            raise AttributeError()
+        value = self._data[name]
+        if isinstance(value, (dict, list)) and name not in self._originals:
+            self._originals[name] = deepcopy(value)
+        return value
 
     def __setattr__(self, name, value):
-        if name in self._own_attrs:
+        if name in PerZoneObject.__slots__:
             return super(PerZoneObject, self).__setattr__(name, value)
         if name in self._data:
+            self._originals.setdefault(name, self._data[name])
             self._data[name] = value
         else:
             raise AttributeError()
 
     def _set_data(self, data):
-        self._saved_data = data
-        self._data = deepcopy(data)
+        self._data = data
+        self._originals = {}
+
+    def _changes(self):
+        """Return the changed attributes, and their new values"""
+        return dict((name, self._data[name])
+                    for name, value in iteritems(self._originals)
+                    if self._data[name] != value)
 
     def save(self):
-        if self._saved_data != self._data:
-            self._set_data(self._save())
+        changes = self._changes()
+        if changes:
+            self._set_data(self._save(changes))
+            self._saved()
 
-    def _save(self):
-        """Save _data to CloudFlare, and return the result"""
+    def _save(self, changes):
+        """Save the changed attributes to CloudFlare, return the result"""
         raise NotImplemented()
 
+    def _saved(self):
+        """Called once the saved data is set"""
+        pass
+
     def delete(self):
         raise NotImplemented()
 
@@ -320,27 +705,80 @@ class PerZoneObject(object):
 
 
 class Record(PerZoneObject):
-    def _save(self):
-        result = self._service.update_dns_record(self.zone.id, self.id,
-                                                 self._data)
-        if result['name'] != self._saved_data['name']:
-            clear_property_cache(self.zone, 'records')
-        return result
+    __slots__ = ()
+
+    def _save(self, changes):
+        return self._service.update_dns_record(self.zone.id, self.id,
+                                               changes)
+
+    def _saved(self):
+        self.zone._index_record(self)
 
     def delete(self):
         self._service.delete_dns_record(self.zone.id, self.id)
-        clear_property_cache(self.zone, 'records')
+        self.zone._unindex_record(self)
 
     def __repr__(self):
         return 'Record<%s %s IN %s %s>' % (self.name, self.ttl, self.type,
                                            self.content)
 
 
+class RecordIndex(dict):
+    """A zone's records, as lists by name, sorted by type and content.
+
+    Records are also indexed by id (`by_id`) and by type. The index is
+    updated in place with `add` and `remove`.
+    """
+    def __init__(self, records=()):
+        super(RecordIndex, self).__init__()
+        self.by_id = {}
+        self._by_type = {}
+        self._keys = {}
+        for record in records:
+            self._insert(record)
+        for value in itervalues(self):
+            value.sort(key=_record_sort_key)
+
+    def get_by_type(self, record_type):
+        return list(itervalues(self._by_type.get(record_type, {})))
+
+    def add(self, record):
+        """Add `record`, replacing the indexed record with its id."""
+        self.remove(record)
+        self._insert(record)
+        self[record.name].sort(key=_record_sort_key)
+
+    def _insert(self, record):
+        self.setdefault(record.name, []).append(record)
+        self._by_type.setdefault(record.type, {})[record.id] = record
+        self.by_id[record.id] = record
+        self._keys[record.id] = (record.name, record.type)
+
+    def remove(self, record):
+        """Remove the record with the id of `record`, if indexed."""
+        # The record may have been renamed since it was indexed
+        key = self._keys.pop(record.id, None)
+        if key is None:
+            return
+        name, record_type = key
+        del self.by_id[record.id]
+        by_type = self._by_type[record_type]
+        del by_type[record.id]
+        if not by_type:
+            del self._by_type[record_type]
+        by_name = self[name]
+        by_name[:] = [r for r in by_name if r.id != record.id]
+        if not by_name:
+            del self[name]
+
+
 class PageRule(PerZoneObject):
-    def _save(self):
+    __slots__ = ()
+
+    def _save(self, changes):
         result = self._service.update_page_rule(
-            self.zone.id, self.id, self._data)
-        if result['priority'] != self._saved_data['priority']:
+            self.zone.id, self.id, changes)
+        if 'priority' in changes:
             clear_property_cache(self.zone, 'page_rules')
         return result
 
@@ -350,3 +788,303 @@ class PageRule(PerZoneObject):
 
     def __repr__(self):
         return 'PageRule <%s>' % self.id
+
+
+def re_verify_zones(zones):
+    """Re-verify `zones`, like `Zone.re_verify`, from a single thread.
+
+    The zones wait for deprovisioning on a shared schedule, so each is
+    re-enabled as soon as it is ready. Returns a `ZoneResult` by zone id.
+    """
+    results = OrderedDict()
+    schedule = []
+    for i, zone in enumerate(zones):
+        results[zone.id] = None
+        heappush(schedule, (time(), i, zone, zone._re_verify_steps()))
+
+    while schedule:
+        due, i, zone, steps = heappop(schedule)
+        delay = due - time()
+        if delay > 0:
+            sleep(delay)
+        try:
+            delay = next(steps)
+        except StopIteration:
+            results[zone.id] = ZoneResult(zone.id, None, None)
+        except Exception as exc:
+            results[zone.id] = ZoneResult(zone.id, None, exc)
+        else:
+            heappush(schedule, (time() + delay, i, zone, steps))
+    return results
+
+
+def iter_zone_settings(zones, max_workers=DEFAULT_MAX_WORKERS):
+    """Fetch the settings of `zones` concurrently.
+
+    Yields a `ZoneResult` per zone id, with its `ZoneSettings`, as they
+    arrive. They are cached as each `Zone.settings`.
+    """
+    zones = OrderedDict((zone.id, zone) for zone in zones)
+
+    def get_settings(zone_id):
+        return zones[zone_id]._service.get_zone_settings(zone_id)
+
+    for result in _iter_zone_results(get_settings, zones, max_workers):
+        if result.error is None:
+            zone = zones[result.zone_id]
+            settings = ZoneSettings(zone, result.result)
+            set_property_cache(zone, 'settings', settings)
+            result = result._replace(result=settings)
+        yield result
+
+
+def zone_settings_matrix(zones, setting_ids, max_workers=DEFAULT_MAX_WORKERS):
+    """Yield the values of `setting_ids`, for `zones`, as they are fetched.
+
+    Each row is a `ZoneResult` with a dict of setting values, by id. Missing
+    settings have a value of `None`.
+    """
+    for result in iter_zone_settings(zones, max_workers):
+        if result.error is None:
+            result = result._replace(result=dict(
+                (setting_id, getattr(result.result, setting_id, None))
+                for setting_id in setting_ids))
+        yield result
+
+
+def rollout_zone_settings(zones, desired, canary=100,
+                          max_workers=DEFAULT_MAX_WORKERS, rate_limiter=None):
+    """Make the settings of `zones` match `desired`, a dict by setting id.
+
+    The current settings are read concurrently. Zones that already comply
+    are left alone, the others only get their differing settings changed.
+    With `canary` under 100, only that percentage of the zones is changed,
+    picked by id so that the same zones are picked on every run. Changes
+    wait for `rate_limiter`, if given.
+
+    Returns a `RolloutResult` by zone id, with a status of `COMPLIANT`,
+    `UPDATED`, `SKIPPED` (outside of the canary) or `FAILED`.
+    """
+    report = OrderedDict()
+    executor = ThreadPoolExecutor(max_workers)
+    updates = []
+
+    def update(settings, changes):
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        for name, value in iteritems(changes):
+            setattr(settings, name, value)
+        settings.save()
+
+    try:
+        for result in iter_zone_settings(zones, max_workers):
+            zone_id = result.zone_id
+            if result.error is not None:
+                report[zone_id] = RolloutResult(
+                    zone_id, FAILED, None, result.error)
+                continue
+            settings = result.result
+            changes = dict(
+                (name, value) for name, value in iteritems(desired)
+                if getattr(settings, name, None) != value)
+            if not changes:
+                report[zone_id] = RolloutResult(zone_id, COMPLIANT, {}, None)
+            elif not _in_canary(zone_id, canary):
+                report[zone_id] = RolloutResult(
+                    zone_id, SKIPPED, changes, None)
+            else:
+                updates.append((zone_id, changes, executor.submit(
+                    update, settings, changes)))
+        for zone_id, changes, future in updates:
+            try:
+                future.result()
+            except Exception as exc:
+                report[zone_id] = RolloutResult(
+                    zone_id, FAILED, changes, exc)
+            else:
+                report[zone_id] = RolloutResult(
+                    zone_id, UPDATED, changes, None)
+    finally:
+        executor.shutdown(wait=True)
+    return report
+
+
+def _in_canary(zone_id, percentage):
+    bucket = int(sha1(zone_id.encode('utf-8')).hexdigest(), 16) % 100
+    return bucket < percentage
+
+
+def _map_zones(fn, zones, max_workers):
+    """Call `fn(zone_id)` for `zones` concurrently.
+
+    Returns a `ZoneResult` by zone id, in the order of `zones`.
+    """
+    zone_ids = [getattr(zone, 'id', zone) for zone in zones]
+    results = OrderedDict((zone_id, None) for zone_id in zone_ids)
+    for result in _iter_zone_results(fn, zone_ids, max_workers):
+        results[result.zone_id] = result
+    return results
+
+
+def _iter_zone_results(fn, zones, max_workers):
+    """Call `fn(zone_id)` for `zones` concurrently.
+
+    Yields a `ZoneResult` per zone, as they complete.
+    """
+    executor = ThreadPoolExecutor(max_workers)
+    futures = {}
+    try:
+        for zone in zones:
+            zone_id = getattr(zone, 'id', zone)
+            futures[executor.submit(fn, zone_id)] = zone_id
+        for future in as_completed(futures):
+            zone_id = futures[future]
+            try:
+                yield ZoneResult(zone_id, future.result(), None)
+            except Exception as exc:
+                yield ZoneResult(zone_id, None, exc)
+    finally:
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def _record_data(name, record_type, content=None, ttl=1, proxied=False,
+                 **kwargs):
+    """Return the API payload for a new record."""
+    data = {
+        'name': name,
+        'type': record_type,
+        'ttl': ttl,
+        'proxied': proxied,
+    }
+
+    if content:
+        data['content'] = content
+
+    if record_type == 'MX':
+        data['priority'] = kwargs['priority']
+    elif record_type == 'SRV':
+        data['data'] = {
+            'name': name,
+            'service': kwargs['service'],
+            'proto': kwargs['protocol'],
+            'priority': kwargs['priority'],
+            'weight': kwargs['weight'],
+            'port': kwargs['port'],
+            'target': kwargs['target'],
+        }
+
+    return data
+
+
+def _page_rule_data(targets=None, url_matches=None, actions=(), priority=1,
+                    status='active'):
+    """Return the API payload for a new page rule."""
+    if url_matches:
+        if targets:
+            raise ValueError(
+                'Only one of targets and url_matches can be specified')
+        targets = [{
+            'target': 'url',
+            'constraint': {
+                'operator': 'matches',
+                'value': url_matches,
+            },
+        }]
+    return {
+        'targets': targets,
+        'actions': actions,
+        'priority': priority,
+        'status': status,
+    }
+
+
+_SYNCED_PAGE_RULE_FIELDS = ('targets', 'actions', 'priority', 'status')
+
+
+def _pop_page_rule(page_rules, field, value):
+    for i, page_rule in enumerate(page_rules):
+        if getattr(page_rule, field) == value:
+            return page_rules.pop(i)
+    return None
+
+
+def _page_rule_priorities(current):
+    """Return new priorities for rules, by ascending priority.
+
+    `current` holds the rules' current priorities, or None for new rules.
+    The most rules possible keep their priority, as long as there is room
+    for the rules between them.
+    """
+    # kept[j]: the most rules kept up to rule j, if j keeps its priority
+    kept = [0] * len(current)
+    previous = [None] * len(current)
+    for j, priority in enumerate(current):
+        if priority is None:
+            continue
+        if priority - 1 >= j:
+            kept[j] = 1
+        for i in range(j):
+            if (kept[i] and current[i] < priority and
+                    priority - current[i] - 1 >= j - i - 1 and
+                    kept[i] + 1 > kept[j]):
+                kept[j] = kept[i] + 1
+                previous[j] = i
+
+    keep = set()
+    if any(kept):
+        j = kept.index(max(kept))
+        while j is not None:
+            keep.add(j)
+            j = previous[j]
+
+    priorities = []
+    last = 0
+    for j, priority in enumerate(current):
+        last = priority if j in keep else last + 1
+        priorities.append(last)
+    return priorities
+
+
+def _page_rule_changes(page_rule, data):
+    """Return the fields of `data` that differ from `page_rule`."""
+    return dict((field, data[field]) for field in _SYNCED_PAGE_RULE_FIELDS
+                if field in data and getattr(page_rule, field, None) !=
+                data[field])
+
+
+def _record_sort_key(record):
+    return (record.type, record.content)
+
+
+_SYNCED_RECORD_FIELDS = ('content', 'ttl', 'proxied', 'priority', 'data')
+
+
+def _pop_record_by_content(records, content):
+    if content is None:
+        return None
+    for i, record in enumerate(records):
+        if record.content == content:
+            return records.pop(i)
+    return None
+
+
+def _record_changes(record, data):
+    """Return the fields of `data` that differ from `record`."""
+    return dict((field, data[field]) for field in _SYNCED_RECORD_FIELDS
+                if field in data and getattr(record, field, None) !=
+                data[field])
+
+
+def _create_record_kwargs(data):
+    """Return the `create_record` arguments for a record dict."""
+    kwargs = dict((key, value) for key, value in iteritems(data)
+                  if key not in ('type', 'data'))
+    kwargs['record_type'] = data['type']
+    if 'data' in data:
+        srv = dict(data['data'])
+        srv.pop('name', None)
+        srv['protocol'] = srv.pop('proto', None)
+        kwargs.update(srv)
+    return kwargs
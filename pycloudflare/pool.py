@@ -0,0 +1,99 @@
+"""Keep-alive HTTP connection pools, shared between service clients."""
+import socket
+from threading import Lock
+
+from requests.adapters import HTTPAdapter
+from six import itervalues
+from urllib3.connection import HTTPConnection
+
+DEFAULT_POOL_OPTIONS = {
+    'pool_size': 10,
+    'max_retries': 0,
+    'keep_alive': 60,
+}
+
+_pools = {}
+_pools_lock = Lock()
+_pool_options = dict(DEFAULT_POOL_OPTIONS)
+
+
+class KeepAliveAdapter(HTTPAdapter):
+    """HTTPAdapter enabling TCP keep-alive on its connections.
+
+    `keep_alive` is the idle time, in seconds, before keep-alive probes are
+    sent. Set it to `None` to leave the socket options alone.
+    """
+    __attrs__ = HTTPAdapter.__attrs__ + ['keep_alive']
+
+    def __init__(self, keep_alive=DEFAULT_POOL_OPTIONS['keep_alive'],
+                 **kwargs):
+        self.keep_alive = keep_alive
+        super(KeepAliveAdapter, self).__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self.keep_alive is not None:
+            kwargs['socket_options'] = (
+                HTTPConnection.default_socket_options +
+                _keep_alive_socket_options(self.keep_alive))
+        super(KeepAliveAdapter, self).init_poolmanager(*args, **kwargs)
+
+
+def _keep_alive_socket_options(idle):
+    options = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    # Not every platform allows tuning the probes
+    if hasattr(socket, 'TCP_KEEPIDLE'):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, idle))
+    if hasattr(socket, 'TCP_KEEPINTVL'):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, idle))
+    return options
+
+
+class ConnectionPool(object):
+    """A pool of up to `pool_size` keep-alive connections.
+
+    `max_retries` is the number of retries for failed connections, handled
+    by urllib3.
+    """
+    def __init__(self, pool_size=DEFAULT_POOL_OPTIONS['pool_size'],
+                 max_retries=DEFAULT_POOL_OPTIONS['max_retries'],
+                 keep_alive=DEFAULT_POOL_OPTIONS['keep_alive']):
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.adapter = KeepAliveAdapter(
+            keep_alive=keep_alive, pool_maxsize=pool_size,
+            max_retries=max_retries)
+
+    def mount(self, session):
+        """Use this pool for the session's HTTPS requests."""
+        session.mount('https://', self.adapter)
+
+    def close(self):
+        self.adapter.close()
+
+
+def configure_connection_pools(**options):
+    """Set the options of connection pools created from now on.
+
+    Accepts the `ConnectionPool` arguments.
+    """
+    unknown = set(options) - set(DEFAULT_POOL_OPTIONS)
+    if unknown:
+        raise TypeError('Unknown options: %s' % ', '.join(sorted(unknown)))
+    with _pools_lock:
+        _pool_options.update(options)
+
+
+def get_connection_pool(key):
+    """Return the shared connection pool for `key`, e.g. credentials."""
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(**_pool_options)
+        return _pools[key]
+
+
+def close_connection_pools():
+    """Close and forget all the shared connection pools."""
+    with _pools_lock:
+        for pool in itervalues(_pools):
+            pool.close()
+        _pools.clear()
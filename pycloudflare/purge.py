@@ -0,0 +1,115 @@
+"""Coalescing of cache purges.
+
+A `PurgeQueue` buffers the files, tags and hosts to purge from each zone for
+a short delay, then purges them with as few requests as CloudFlare allows.
+"""
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock, Timer
+
+PURGE_TYPES = ('files', 'tags', 'hosts')
+# Items CloudFlare accepts per purge request
+MAX_PURGE_ITEMS = 30
+
+
+class _PendingPurge(object):
+    """The purges queued for a zone, deduplicated."""
+    def __init__(self):
+        self.everything = False
+        self.items = dict((purge_type, []) for purge_type in PURGE_TYPES)
+        self._seen = set()
+        self.futures = []
+
+    def add(self, future, **items):
+        self.futures.append(future)
+        if not any(items.values()):
+            self.everything = True
+        for purge_type in PURGE_TYPES:
+            for item in items.get(purge_type) or ():
+                if (purge_type, item) not in self._seen:
+                    self._seen.add((purge_type, item))
+                    self.items[purge_type].append(item)
+
+    def requests(self, max_items):
+        """Return the `purge_cache` arguments of the requests to send."""
+        if self.everything:
+            return [{}]
+        requests = []
+        for purge_type in PURGE_TYPES:
+            items = self.items[purge_type]
+            for i in range(0, len(items), max_items):
+                requests.append({purge_type: items[i:i + max_items]})
+        return requests
+
+
+class PurgeQueue(object):
+    """Coalesce the purges of `service`, sending them after `delay` seconds.
+
+    Purges are deduplicated per zone, and split into requests of up to
+    `max_items`. A purge of everything supersedes the other purges of its
+    zone. Up to `max_workers` requests are sent concurrently.
+    """
+    def __init__(self, service, delay=1.0, max_items=MAX_PURGE_ITEMS,
+                 max_workers=4):
+        self._service = service
+        self.delay = delay
+        self.max_items = max_items
+        self._executor = ThreadPoolExecutor(max_workers)
+        self._lock = Lock()
+        self._pending = {}
+        self._timer = None
+
+    def purge(self, zone_id, files=None, tags=None, hosts=None):
+        """Queue a purge, like `CloudFlareService.purge_cache`.
+
+        Returns a Future, resolved once the purge is sent.
+        """
+        future = Future()
+        with self._lock:
+            pending = self._pending.setdefault(zone_id, _PendingPurge())
+            pending.add(future, files=files, tags=tags, hosts=hosts)
+            if self._timer is None:
+                self._timer = Timer(self.delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        return future
+
+    def flush(self):
+        """Send the queued purges now."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        for zone_id, purge in pending.items():
+            requests = [
+                self._executor.submit(
+                    self._service.purge_cache, zone_id, **kwargs)
+                for kwargs in purge.requests(self.max_items)]
+            _resolve_when_done(requests, purge.futures)
+
+    def close(self):
+        """Send the queued purges, and wait for them."""
+        self.flush()
+        self._executor.shutdown(wait=True)
+
+
+def _resolve_when_done(requests, futures):
+    """Resolve `futures` once all the `requests` futures are done."""
+    lock = Lock()
+    remaining = [len(requests)]
+
+    def request_done(_):
+        with lock:
+            remaining[0] -= 1
+            if remaining[0]:
+                return
+        errors = [request.exception() for request in requests
+                  if request.exception() is not None]
+        for future in futures:
+            if errors:
+                future.set_exception(errors[0])
+            else:
+                future.set_result(None)
+
+    for request in requests:
+        request.add_done_callback(request_done)
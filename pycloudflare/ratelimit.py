@@ -0,0 +1,148 @@
+"""Client-side rate limiting, to stay within CloudFlare's API budget.
+
+CloudFlare allows 1200 requests per 5 minutes, per user. A `RateLimiter` is
+a token bucket sized so that no window of that period exceeds the budget.
+It can be shared by several services (and threads), or by several processes
+through a `FileBackend`.
+"""
+import json
+from contextlib import contextmanager
+from email.utils import mktime_tz, parsedate_tz
+from threading import Lock
+from time import sleep, time
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+DEFAULT_RATE = 1200
+DEFAULT_PERIOD = 300
+DEFAULT_BURST = 50
+_EPSILON = 1e-9
+
+
+class MemoryBackend(object):
+    """Keeps the bucket in memory, shared by the threads of a process."""
+    def __init__(self):
+        self._lock = Lock()
+        self._state = {}
+
+    @contextmanager
+    def transaction(self):
+        with self._lock:
+            yield self._state
+
+
+class FileBackend(object):
+    """Keeps the bucket in a locked file, shared by processes on a host."""
+    def __init__(self, path):
+        if fcntl is None:
+            raise RuntimeError('FileBackend requires fcntl')
+        self.path = path
+        self._lock = Lock()
+
+    @contextmanager
+    def transaction(self):
+        with self._lock, open(self.path, 'a+') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                content = f.read()
+                state = json.loads(content) if content else {}
+                yield state
+                f.seek(0)
+                f.truncate()
+                json.dump(state, f)
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class RateLimiter(object):
+    """Token bucket allowing `rate` requests per `period` seconds.
+
+    Up to `burst` requests can be made at once, the rest of the budget is
+    spread over the period.
+    """
+    def __init__(self, rate=DEFAULT_RATE, period=DEFAULT_PERIOD,
+                 burst=DEFAULT_BURST, backend=None):
+        if not 0 < burst < rate:
+            raise ValueError('burst must be between 0 and rate')
+        self.capacity = burst
+        self.refill_rate = float(rate - burst) / period
+        self.backend = backend or MemoryBackend()
+        self.waits = 0
+        self.wait_time = 0.0
+
+    def _refill(self, state, now):
+        tokens = state.get('tokens', self.capacity)
+        updated = state.get('updated', now)
+        state['tokens'] = min(
+            self.capacity, tokens + (now - updated) * self.refill_rate)
+        state['updated'] = now
+
+    def acquire(self):
+        """Take a token, blocking until one is available."""
+        while True:
+            with self.backend.transaction() as state:
+                now = time()
+                self._refill(state, now)
+                blocked = state.get('blocked_until', 0) - now
+                # Allow for rounding errors in the refill
+                if blocked <= 0 and state['tokens'] >= 1 - _EPSILON:
+                    state['tokens'] = max(0, state['tokens'] - 1)
+                    return
+                delay = max(
+                    blocked, (1 - state['tokens']) / self.refill_rate)
+            self.waits += 1
+            self.wait_time += delay
+            sleep(delay)
+
+    def update(self, response):
+        """Adjust the bucket to the rate limiting headers of a response."""
+        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        remaining = (response.headers.get('X-RateLimit-Remaining') or
+                     response.headers.get('RateLimit-Remaining'))
+        if (response.status_code != 429 and retry_after is None and
+                remaining is None):
+            return
+
+        with self.backend.transaction() as state:
+            now = time()
+            self._refill(state, now)
+            if remaining is not None:
+                state['tokens'] = min(state['tokens'], float(remaining))
+            if response.status_code == 429:
+                state['tokens'] = 0
+                retry_after = retry_after or 1 / self.refill_rate
+            if retry_after is not None:
+                state['blocked_until'] = max(
+                    state.get('blocked_until', 0), now + retry_after)
+
+    def usage(self):
+        """Return the state of the budget, for metrics."""
+        with self.backend.transaction() as state:
+            now = time()
+            self._refill(state, now)
+            return {
+                'capacity': self.capacity,
+                'available': state['tokens'],
+                'used': self.capacity - state['tokens'],
+                'blocked_for': max(0, state.get('blocked_until', 0) - now),
+                'waits': self.waits,
+                'wait_time': self.wait_time,
+            }
+
+
+def parse_retry_after(value):
+    """Return the number of seconds in a Retry-After header."""
+    if value is None:
+        return None
+    try:
+        return max(0, float(value))
+    except ValueError:
+        parsed = parsedate_tz(value)
+        if parsed is None:
+            return None
+        return max(0, mktime_tz(parsed) - time())
@@ -0,0 +1,101 @@
+"""Retries, with exponential backoff and jitter, for transient failures.
+
+Only requests that are safe to replay are retried: those with an idempotent
+HTTP method, and requests explicitly sent with `idempotent=True`.
+"""
+from random import uniform
+from time import sleep, time
+
+from demands import HTTPServiceError
+from requests.exceptions import ConnectionError, Timeout
+
+from pycloudflare.ratelimit import parse_retry_after
+
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'PATCH',
+                                'DELETE'])
+RETRY_STATUS_CODES = frozenset([429, 500, 502, 503, 504])
+
+
+class RetryPolicy(object):
+    """Retry up to `max_attempts` times, within `deadline` seconds.
+
+    The delay before retry n is drawn from [0, `backoff` * 2 ** n], capped by
+    `max_backoff`, unless the response asks for longer with `Retry-After`.
+
+    `on_attempt`, if given, is called after every attempt with the method,
+    path, attempt number, duration in seconds and the exception raised (or
+    `None`).
+    """
+    def __init__(self, max_attempts=5, backoff=0.5, max_backoff=30,
+                 deadline=120, status_codes=RETRY_STATUS_CODES,
+                 on_attempt=None):
+        if max_attempts < 1:
+            raise ValueError('max_attempts must be at least 1')
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.deadline = deadline
+        self.status_codes = frozenset(status_codes)
+        self.on_attempt = on_attempt
+
+    def should_retry(self, method, exc, idempotent=None):
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        if not idempotent:
+            return False
+        if isinstance(exc, HTTPServiceError):
+            return exc.response.status_code in self.status_codes
+        return isinstance(exc, (ConnectionError, Timeout))
+
+    def get_delay(self, attempt, exc):
+        delay = uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        if isinstance(exc, HTTPServiceError):
+            retry_after = parse_retry_after(
+                exc.response.headers.get('Retry-After'))
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+        return delay
+
+    def call(self, send, method, path, idempotent=None, **kwargs):
+        """Call `send(method, path, **kwargs)`, retrying its failures."""
+        start = time()
+        attempt = 0
+        while True:
+            attempt += 1
+            attempt_start = time()
+            try:
+                result = send(method, path, **kwargs)
+            except Exception as exc:
+                self._attempted(method, path, attempt, attempt_start, exc)
+                if (attempt >= self.max_attempts or
+                        not self.should_retry(method, exc, idempotent)):
+                    raise
+                delay = self.get_delay(attempt - 1, exc)
+                if time() + delay - start > self.deadline:
+                    raise
+                sleep(delay)
+            else:
+                self._attempted(method, path, attempt, attempt_start, None)
+                return result
+
+    def _attempted(self, method, path, attempt, attempt_start, exc):
+        if self.on_attempt is not None:
+            self.on_attempt(method, path, attempt, time() - attempt_start,
+                            exc)
+
+
+class RetryingServiceMixin(object):
+    """Retry the requests of an HTTPServiceClient with its `retry_policy`.
+
+    Requests accept an `idempotent` argument, to force retrying (or not)
+    regardless of the HTTP method.
+    """
+    retry_policy = None
+
+    def request(self, method, path, **kwargs):
+        idempotent = kwargs.pop('idempotent', None)
+        send = super(RetryingServiceMixin, self).request
+        if self.retry_policy is None:
+            return send(method, path, **kwargs)
+        return self.retry_policy.call(
+            send, method, path, idempotent=idempotent, **kwargs)
@@ -1,11 +1,18 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
 from demands import HTTPServiceClient, HTTPServiceError
 from demands.pagination import (
     PAGE_PARAM, PAGE_SIZE_PARAM, PAGE_SIZE, PAGINATION_TYPE, RESULTS_KEY,
     PaginatedResults, PaginationType)
+from six import iteritems
 from six.moves.urllib.parse import urlencode
 
+from pycloudflare.cache import CachingServiceMixin, cache_namespace
 from pycloudflare.config import get_config
 from pycloudflare.exceptions import AccountNotFound, CustomHostnameNotFound
+from pycloudflare.pool import get_connection_pool
+from pycloudflare.retry import RetryingServiceMixin
 
 
 class ZoneNotFound(Exception):
@@ -20,32 +27,192 @@ CF_PAGINATION_OPTIONS = {
 _ADMINSTRATOR_ROLE_ID = '05784afa30c1afe1440e79d9351c7430'
 
 
-def cloudflare_paginated_results(fn, args=(), kwargs=None):
-    return PaginatedResults(fn, args=args, kwargs=kwargs,
-                            **CF_PAGINATION_OPTIONS)
-
-
-class CloudFlareService(HTTPServiceClient):
+class ResultList(list):
+    """A page of results, carrying CloudFlare's pagination metadata.
+
+    `result_info` holds the `page`, `per_page`, `count`, `total_pages` and
+    `total_count` of the listing, as returned by the API.
+    """
+    def __init__(self, results, result_info):
+        super(ResultList, self).__init__(results)
+        self.result_info = result_info
+
+
+class CloudFlarePaginatedResults(PaginatedResults):
+    """Paginated results, that stop on the listing's `total_pages`.
+
+    This avoids requesting an empty page, when the last page is full.
+    """
+    def __iter__(self):
+        for page_id in self._page_ids():
+            page = self._get_page(page_id)
+            for item in page.items:
+                yield item
+            if self._is_last_page(page, page_id):
+                return
+
+    def _is_last_page(self, page, page_id):
+        total_pages = _result_info(page).get('total_pages')
+        if total_pages is not None and page_id >= total_pages:
+            return True
+        return page.is_last_page
+
+    def total_count(self):
+        """Return the number of results, by requesting the first page."""
+        page = self._get_page(next(self._page_ids()))
+        result_info = _result_info(page)
+        if 'total_count' not in result_info:
+            raise ValueError('The results have no result_info')
+        return result_info['total_count']
+
+
+def _result_info(page):
+    return getattr(page.items, 'result_info', None) or {}
+
+
+class PrefetchingPaginatedResults(CloudFlarePaginatedResults):
+    """Paginated results, with pages fetched concurrently.
+
+    Items are still yielded in order. Once the first page is read, its
+    `result_info.total_pages` is used to fetch the remaining pages on a pool
+    of `max_workers` threads. Without `result_info`, up to `max_workers`
+    pages are fetched ahead of the one being consumed, until the last page
+    is found.
+    """
+    def __init__(self, paginated_fn, args=(), kwargs=None, max_workers=4,
+                 **options):
+        super(PrefetchingPaginatedResults, self).__init__(
+            paginated_fn, args=args, kwargs=kwargs, **options)
+        self.max_workers = max_workers
+
+    def __iter__(self):
+        if self.options[PAGINATION_TYPE] != PaginationType.PAGE:
+            raise ValueError('Prefetching requires PaginationType.PAGE')
+
+        page_ids = self._page_ids()
+        first_page_id = next(page_ids)
+        first_page = self._get_page(first_page_id)
+        for item in first_page.items:
+            yield item
+        if self._is_last_page(first_page, first_page_id):
+            return
+
+        total_pages = _result_info(first_page).get('total_pages')
+        if total_pages is not None:
+            page_ids = iter(range(first_page_id + 1, total_pages + 1))
+
+        executor = ThreadPoolExecutor(self.max_workers)
+        in_flight = deque()
+
+        def fetch_next_page():
+            page_id = next(page_ids, None)
+            if page_id is not None:
+                in_flight.append(
+                    (page_id, executor.submit(self._get_page, page_id)))
+
+        try:
+            for _ in range(self.max_workers):
+                fetch_next_page()
+            while in_flight:
+                page_id, future = in_flight.popleft()
+                page = future.result()
+                for item in page.items:
+                    yield item
+                if self._is_last_page(page, page_id):
+                    return
+                fetch_next_page()
+        finally:
+            for _, future in in_flight:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+
+def cloudflare_paginated_results(fn, args=(), kwargs=None, max_workers=None,
+                                 per_page=None):
+    """Iterate over all the results of the paginated endpoint `fn`.
+
+    If `max_workers` is given, pages are fetched concurrently, by that many
+    threads. `per_page` overrides the default page size.
+    """
+    options = dict(CF_PAGINATION_OPTIONS)
+    if per_page:
+        options[PAGE_SIZE] = per_page
+    if max_workers:
+        return PrefetchingPaginatedResults(
+            fn, args=args, kwargs=kwargs, max_workers=max_workers, **options)
+    return CloudFlarePaginatedResults(fn, args=args, kwargs=kwargs, **options)
+
+
+class CloudFlareService(CachingServiceMixin, RetryingServiceMixin,
+                        HTTPServiceClient):
+
+    def __init__(self, api_key, email, connection_pool=None,
+                 rate_limiter=None, retry_policy=None, cache=None):
+        """
+        Requests go through `connection_pool`, by default the pool shared by
+        all services with these credentials.
 
-    def __init__(self, api_key, email):
+        If a `rate_limiter` is given, requests wait for its budget.
+        Transient failures of idempotent requests are retried according to
+        `retry_policy`.
+        Results of read endpoints are kept in `cache`, if given.
+        """
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy
+        self.cache = cache
+        self.cache_namespace = cache_namespace(api_key, email)
+        if connection_pool is None:
+            connection_pool = get_connection_pool(('api', api_key, email))
         headers = {
             'X-Auth-Key': api_key,
             'X-Auth-Email': email,
         }
         url = 'https://api.cloudflare.com/client/v4/'
         super(CloudFlareService, self).__init__(
-            url, headers=headers, send_as_json=True)
+            url, headers=headers, send_as_json=True,
+            max_retries=connection_pool.max_retries)
+        connection_pool.mount(self)
+        self.connection_pool = connection_pool
+
+    def pre_send(self, request_params):
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        return super(CloudFlareService, self).pre_send(request_params)
+
+    def is_acceptable(self, response, request_params):
+        if self.rate_limiter is not None:
+            self.rate_limiter.update(response)
+        return super(CloudFlareService, self).is_acceptable(
+            response, request_params)
 
     def post_send(self, response, **kwargs):
         response = super(CloudFlareService, self).post_send(response, **kwargs)
-        return response.json()['result']
+        response_json = response.json()
+        result = response_json['result']
+        if isinstance(result, list) and 'result_info' in response_json:
+            return ResultList(result, response_json['result_info'])
+        return result
+
+    def dump_cached(self, result):
+        return {
+            'result': result,
+            'result_info': getattr(result, 'result_info', None),
+        }
+
+    def load_cached(self, data):
+        if data['result_info'] is not None:
+            return ResultList(data['result'], data['result_info'])
+        return data['result']
 
-    def _get_paginated(self, base_url, page, per_page):
-        params = {
+    def _get_paginated(self, base_url, page, per_page, filters=None):
+        params = dict((key, _query_value(value))
+                      for key, value in iteritems(filters or {})
+                      if value is not None)
+        params.update({
             'page': page,
             'per_page': per_page,
-        }
-        return self.get(base_url + '?' + urlencode(params))
+        })
+        return self.get(base_url + '?' + urlencode(sorted(params.items())))
 
     def create_account(self, name, account_type='standard'):
         return self.post('accounts', json={
@@ -76,8 +243,22 @@ class CloudFlareService(HTTPServiceClient):
         return self.delete(
             'accounts/{}/members/{}'.format(account_id, member_id))
 
-    def get_zones(self, page=1, per_page=CF_PAGINATION_OPTIONS[PAGE_SIZE]):
-        return self._get_paginated('zones', page, per_page)
+    def get_zones(self, page=1, per_page=CF_PAGINATION_OPTIONS[PAGE_SIZE],
+                  name=None, status=None, account_id=None, match=None,
+                  order=None, direction=None):
+        """
+        List zones, filtered by the server. `match` is 'all' or 'any' of the
+        filters, `order` the field to order by, in `direction` 'asc' or
+        'desc'.
+        """
+        return self._get_paginated('zones', page, per_page, {
+            'name': name,
+            'status': status,
+            'account.id': account_id,
+            'match': match,
+            'order': order,
+            'direction': direction,
+        })
 
     def get_zone(self, zone_id):
         return self.get('zones/%s' % zone_id)
@@ -114,9 +295,22 @@ class CloudFlareService(HTTPServiceClient):
         return self.delete('zones/%s' % zone_id)
 
     def get_dns_records(self, zone_id, page=1,
-                        per_page=CF_PAGINATION_OPTIONS[PAGE_SIZE]):
+                        per_page=CF_PAGINATION_OPTIONS[PAGE_SIZE], name=None,
+                        record_type=None, content=None, proxied=None,
+                        match=None, order=None, direction=None):
+        """
+        List DNS records, filtered by the server, like `get_zones`.
+        """
         url = 'zones/%s/dns_records' % zone_id
-        return self._get_paginated(url, page, per_page)
+        return self._get_paginated(url, page, per_page, {
+            'name': name,
+            'type': record_type,
+            'content': content,
+            'proxied': proxied,
+            'match': match,
+            'order': order,
+            'direction': direction,
+        })
 
     def get_dns_record(self, zone_id, record_id):
         return self.get('zones/%s/dns_records/%s' % (zone_id, record_id))
@@ -205,6 +399,12 @@ class CloudFlareService(HTTPServiceClient):
             'zones/{}/custom_hostnames/{}'.format(zone_id, hostname_id))
 
 
+def _query_value(value):
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return value
+
+
 CF_HOST_PAGINATION_OPTIONS = {
     PAGE_PARAM: 'offset',
     PAGE_SIZE_PARAM: 'limit',
@@ -219,15 +419,24 @@ def cloudflare_host_paginated_results(fn, args=(), kwargs=None):
                             **CF_HOST_PAGINATION_OPTIONS)
 
 
-class CloudFlareHostService(HTTPServiceClient):
-    def __init__(self, **kwargs):
+class CloudFlareHostService(RetryingServiceMixin, HTTPServiceClient):
+    def __init__(self, connection_pool=None, retry_policy=None, **kwargs):
+        """
+        All Host API calls are POSTs, only the lookups are retried by
+        `retry_policy`.
+        """
+        self.retry_policy = retry_policy
         config = get_config()
+        if connection_pool is None:
+            connection_pool = get_connection_pool(('host', config['api_key']))
         data = {
             'host_key': config['api_key'],
         }
         url = 'https://api.cloudflare.com/'
         self.gw = 'host-gw.html'
-        super(CloudFlareHostService, self).__init__(url, data=data)
+        super(CloudFlareHostService, self).__init__(
+            url, data=data, max_retries=connection_pool.max_retries)
+        connection_pool.mount(self)
 
     def post_send(self, response, **kwargs):
         """
@@ -259,7 +468,7 @@ class CloudFlareHostService(HTTPServiceClient):
             'cloudflare_email': email,
             'unique_id': unique_id,
         }
-        return self.post(self.gw, data)
+        return self.post(self.gw, data, idempotent=True)
 
     def full_zone_set(self, zone_name, user_key, jumpstart=False):
         data = {
@@ -291,4 +500,4 @@ class CloudFlareHostService(HTTPServiceClient):
             'zone_name': zone_name,
             'zone_status': zone_status,
         }
-        return self.post(self.gw, data)
+        return self.post(self.gw, data, idempotent=True)
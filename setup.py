@@ -18,6 +18,7 @@ setup(
     test_suite='nose.collector',
     install_requires=[
         'demands >= 4.0.0, < 6.0.0',
+        'futures >= 3.0.0, < 4.0.0; python_version < "3"',
         'property-caching >= 1.0.0, < 2.0.0',
         'six >= 1.4.0, < 2.0.0',
     ],
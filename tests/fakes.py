@@ -1,7 +1,21 @@
 from copy import deepcopy
 from uuid import uuid4
 
-from six import itervalues
+from mock import Mock
+from six import iteritems, itervalues
+
+from pycloudflare.services import HTTPServiceError, ResultList
+
+
+def paginate(objects, page, per_page):
+    start = (page - 1) * per_page
+    return ResultList(deepcopy(objects[start:start + per_page]), {
+        'page': page,
+        'per_page': per_page,
+        'count': len(objects[start:start + per_page]),
+        'total_count': len(objects),
+        'total_pages': -(-len(objects) // per_page),
+    })
 
 
 class FakeHostService(object):
@@ -158,12 +172,15 @@ class FakeService(object):
         zone.pop('_settings')
         return zone
 
-    def get_zones(self, page=1, per_page=50):
-        page -= 1  # Map to our 0-indexed list
-        def iter_zones():
-            for zone in list(self.zones.values())[page:page + per_page]:
-                yield self._clean_zone(zone)
-        return list(iter_zones())
+    def get_zones(self, page=1, per_page=50, name=None, status=None,
+                  account_id=None, match=None, order=None, direction=None):
+        zones = [self._clean_zone(zone) for zone in itervalues(self.zones)
+                 if name in (None, zone['name']) and
+                 status in (None, zone['status'])]
+        return paginate(zones, page, per_page)
+
+    def get_zone(self, zone_id):
+        return self._clean_zone(self.zones[zone_id])
 
     def get_zone_by_name(self, name):
         for zone in itervalues(self.zones):
@@ -184,10 +201,18 @@ class FakeService(object):
     def get_zone_settings(self, zone_id):
         return deepcopy(list(self.zones[zone_id]['_settings'].values()))
 
+    def get_zone_setting(self, zone_id, setting):
+        try:
+            return deepcopy(self.zones[zone_id]['_settings'][setting])
+        except KeyError:
+            raise HTTPServiceError(Mock(
+                status_code=400, url='url', json=Mock(return_value={})))
+
     def set_zone_settings(self, zone_id, items):
+        settings = self.zones[zone_id]['_settings']
         for setting in items:
-            self.zones[zone_id]['_settings'][setting['id']].update(setting)
-        return deepcopy(self.zones[zone_id]['_settings'])
+            settings[setting['id']].update(setting)
+        return [deepcopy(settings[setting['id']]) for setting in items]
 
     def create_dns_record(self, zone_id, data):
         data.update({
@@ -204,8 +229,7 @@ class FakeService(object):
         return deepcopy(data)
 
     def _get_object(self, key, zone_id, page, per_page):
-        page -= 1  # Map to our 0-indexed list
-        return deepcopy(self.zones[zone_id][key][page:page + per_page])
+        return paginate(self.zones[zone_id][key], page, per_page)
 
     def _delete_object(self, key, zone_id, object_id):
         objects = [obj for obj in self.zones[zone_id][key]
@@ -223,8 +247,20 @@ class FakeService(object):
         obj.update(data)
         return deepcopy(obj)
 
-    def get_dns_records(self, zone_id, page=1, per_page=50):
-        return self._get_object('_records', zone_id, page, per_page)
+    def get_dns_records(self, zone_id, page=1, per_page=50, name=None,
+                        record_type=None, content=None, proxied=None,
+                        match=None, order=None, direction=None):
+        filters = {
+            'name': name,
+            'type': record_type,
+            'content': content,
+            'proxied': proxied,
+        }
+        records = [
+            record for record in self.zones[zone_id]['_records']
+            if all(value in (None, record.get(key))
+                   for key, value in iteritems(filters))]
+        return paginate(records, page, per_page)
 
     def delete_dns_record(self, zone_id, record_id):
         return self._delete_object('_records', zone_id, record_id)
@@ -252,3 +288,6 @@ class FakeService(object):
 
     def purge_cache(self, zone_id, files=None, tags=None, hosts=None):
         return
+
+    def invalidate_zones(self):
+        return
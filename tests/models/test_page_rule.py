@@ -1,6 +1,7 @@
 from copy import deepcopy
 
 from mock import patch
+from property_caching import clear_property_cache
 from six import string_types
 
 from pycloudflare.models import PageRule, User
@@ -132,14 +133,145 @@ class TestUpdatePageRule(FakedServiceTestCase):
     def test_save_performs_update(self):
         self.page_rule.actions[0]['value'] = 'off'
         page_rule_id = self.page_rule.id
-        page_rule_data = deepcopy(self.page_rule._data)
+        actions = deepcopy(self.page_rule.actions)
         with patch.object(self.page_rule._service, 'update_page_rule'):
             self.page_rule.save()
             self.page_rule._service.update_page_rule.assert_called_with(
-                self.zone.id, page_rule_id, page_rule_data)
+                self.zone.id, page_rule_id, {'actions': actions})
 
     def test_invalidates_page_rules_on_priority_change(self):
         old_page_rules = self.zone.page_rules
         self.page_rule.priority = 42
         self.page_rule.save()
         self.assertIsNot(self.zone.page_rules, old_page_rules)
+
+
+class TestSyncPageRules(FakedServiceTestCase):
+    def setUp(self):
+        self.user = User.get(email='foo@example.net')
+        self.zone = self.user.get_zone_by_name('example.com')
+        self.page_rule = self.zone.page_rules[0]
+        self.targets = deepcopy(self.page_rule.targets)
+        self.other_targets = [{
+            'target': 'url',
+            'constraint': {'operator': 'matches', 'value': '*example.com/*'},
+        }]
+
+    def test_no_changes_for_matching_rules(self):
+        plan = self.zone.sync_page_rules([{
+            'targets': self.targets,
+            'actions': [{'id': 'always_online', 'value': 'on'}],
+            'priority': 1,
+        }], dry_run=True)
+        self.assertEqual(plan, [])
+
+    def test_updates_changed_fields(self):
+        actions = [{'id': 'always_online', 'value': 'off'}]
+        plan = self.zone.sync_page_rules([{
+            'targets': self.targets,
+            'actions': actions,
+            'priority': 2,
+        }], dry_run=True)
+        self.assertEqual(
+            plan, [('update', self.page_rule, {'actions': actions})])
+
+    def test_matches_moved_rules_by_actions(self):
+        plan = self.zone.sync_page_rules([{
+            'targets': self.other_targets,
+            'actions': [{'id': 'always_online', 'value': 'on'}],
+        }], dry_run=True)
+        self.assertEqual(plan, [
+            ('update', self.page_rule, {'targets': self.other_targets})])
+
+    def test_applies_plan_to_cached_rules(self):
+        page_rules = self.zone.page_rules
+        results = self.zone.sync_page_rules([
+            {'targets': self.other_targets,
+             'actions': [{'id': 'cache_level', 'value': 'bypass'}],
+             'priority': 2},
+        ])
+        self.assertEqual([result.change[0] for result in results],
+                         ['delete', 'create'])
+        self.assertEqual([result.error for result in results], [None, None])
+        self.assertIs(self.zone.page_rules, page_rules)
+        self.assertEqual([pr.targets for pr in page_rules],
+                         [self.other_targets])
+        self.assertEqual(len(self.zone._service.get_page_rules(self.zone.id)),
+                         1)
+
+    def test_keeps_cached_rules_sorted(self):
+        other = self.zone.create_page_rule(
+            targets=self.other_targets, actions=[], priority=2)
+        page_rules = self.zone.page_rules
+        self.zone.sync_page_rules([
+            {'targets': self.targets, 'actions': self.page_rule.actions,
+             'priority': 3},
+            {'targets': self.other_targets, 'actions': [], 'priority': 2},
+        ])
+        self.assertEqual([pr.id for pr in page_rules],
+                         [other.id, self.page_rule.id])
+
+
+def url_rule(pattern, priority=None):
+    data = {
+        'targets': [{
+            'target': 'url',
+            'constraint': {'operator': 'matches', 'value': pattern},
+        }],
+        'actions': [{'id': 'cache_level', 'value': pattern}],
+    }
+    if priority is not None:
+        data['priority'] = priority
+    return data
+
+
+class TestSyncPageRulesOrder(FakedServiceTestCase):
+    def setUp(self):
+        self.user = User.get(email='foo@example.net')
+        self.zone = self.user.get_zone_by_name('example.com')
+        self.zone.page_rules[0].delete()
+        for priority, pattern in enumerate('abcd', 1):
+            self.zone.create_page_rule(**url_rule(pattern, priority))
+        clear_property_cache(self.zone, 'page_rules')
+        self.a, self.b, self.c, self.d = self.zone.page_rules
+
+    def desired(self, *rules):
+        return [url_rule(page_rule.targets[0]['constraint']['value'])
+                for page_rule in rules]
+
+    def updates(self, plan):
+        return [change for change in plan if change[0] == 'update']
+
+    def test_keeps_priorities_of_rules_in_order(self):
+        desired = [url_rule(pattern, priority)
+                   for priority, pattern in enumerate('abcde', 2)]
+        plan = self.zone.sync_page_rules(desired, dry_run=True)
+        self.assertEqual(plan, [('create', dict(desired[4], priority=5))])
+
+    def test_appends_rules_without_updates(self):
+        desired = self.desired(self.a, self.b, self.c, self.d)
+        desired.append(url_rule('e'))
+        plan = self.zone.sync_page_rules(desired, dry_run=True)
+        self.assertEqual([change[0] for change in plan], ['create'])
+
+    def test_moves_rule_with_one_update(self):
+        plan = self.zone.sync_page_rules(
+            self.desired(self.b, self.c, self.d, self.a), dry_run=True)
+        self.assertEqual(plan, [('update', self.a, {'priority': 5})])
+
+    def test_inserts_rule_updating_the_rules_after_it(self):
+        desired = self.desired(self.a, self.b, self.c, self.d)
+        desired.insert(2, url_rule('e'))
+        plan = self.zone.sync_page_rules(desired, dry_run=True)
+        self.assertEqual(
+            [(change[1], change[2]) for change in self.updates(plan)],
+            [(self.c, {'priority': 4}), (self.d, {'priority': 5})])
+        self.assertEqual(plan[-1][1]['priority'], 3)
+
+    def test_applies_order(self):
+        self.zone.sync_page_rules(
+            self.desired(self.d, self.a, self.b, self.c))
+        self.assertEqual(self.zone.page_rules,
+                         [self.d, self.a, self.b, self.c])
+        priorities = [pr.priority for pr in self.zone.page_rules]
+        self.assertEqual(priorities, sorted(set(priorities)))
@@ -109,6 +109,13 @@ class TestDeleteRecord(FakedServiceTestCase):
         self.record.delete()
         self.assertEqual(self.zone.records, {})
 
+    def test_removes_record_from_cached_records(self):
+        records = self.zone.records
+        self.record.delete()
+        self.assertIs(self.zone.records, records)
+        self.assertEqual(records.by_id, {})
+        self.assertEqual(self.zone.get_records_by_type('A'), [])
+
 
 class TestUpdateRecord(FakedServiceTestCase):
     def setUp(self):
@@ -134,13 +141,51 @@ class TestUpdateRecord(FakedServiceTestCase):
         self.record.proxied = True
         record_id = self.record.id
         record_data = deepcopy(self.record._data)
-        with patch.object(self.record._service, 'update_dns_record'):
+        with patch.object(self.record._service, 'update_dns_record',
+                          return_value=deepcopy(record_data)):
             self.record.save()
             self.record._service.update_dns_record.assert_called_with(
-                self.zone.id, record_id, record_data)
+                self.zone.id, record_id, {'proxied': True})
+
+    def test_save_updates_data_from_result(self):
+        self.record.ttl = 300
+        self.record.save()
+        self.assertEqual(self.record.ttl, 300)
+        self.assertEqual(self.record.content, '1.2.3.4')
+        self.assertEqual(self.record._originals, {})
+
+    def test_has_no_instance_dict(self):
+        self.assertFalse(hasattr(self.record, '__dict__'))
+
+    def test_doesnt_copy_data(self):
+        self.assertEqual(self.record._originals, {})
+
+    def test_save_after_reverting_is_noop(self):
+        self.record.proxied = True
+        self.record.proxied = False
+        with patch.object(self.record._service, 'update_dns_record'):
+            self.record.save()
+            self.assertEqual(
+                self.record._service.update_dns_record.call_count, 0)
+
+    def test_in_place_changes_are_saved(self):
+        self.record.data['weight'] = 5
+        with patch.object(self.record._service, 'update_dns_record',
+                          return_value=deepcopy(self.record._data)):
+            self.record.save()
+            self.record._service.update_dns_record.assert_called_once_with(
+                self.zone.id, self.record.id, {'data': {'weight': 5}})
 
     def test_invalidates_zone_records_on_rename(self):
         self.assertNotIn('quux.example.com', self.zone.records)
         self.record.name = 'quux.example.com'
         self.record.save()
         self.assertIn('quux.example.com', self.zone.records)
+
+    def test_moves_record_in_cached_records(self):
+        records = self.zone.records
+        self.record.name = 'quux.example.com'
+        self.record.save()
+        self.assertIs(self.zone.records, records)
+        self.assertNotIn('example.com', records)
+        self.assertEqual(records['quux.example.com'], [self.record])
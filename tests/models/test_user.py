@@ -1,4 +1,8 @@
+from mock import Mock, patch
+
+from pycloudflare.exceptions import SSLUnavailable
 from pycloudflare.models import User, Zone
+from pycloudflare.services import HTTPServiceError
 from tests.models import FakedServiceTestCase
 
 
@@ -50,3 +54,81 @@ class TestUserZones(FakedServiceTestCase):
     def test_get_zone_by_name_returns_zone_objects(self):
         zone = self.user.get_zone_by_name('example.com')
         self.assertIsInstance(zone, Zone)
+
+    def test_iter_zones_can_prefetch_pages(self):
+        zones = list(self.user.iter_zones(max_workers=2))
+        self.assertEqual(len(zones), 2)
+
+    def test_count_zones(self):
+        self.assertEqual(self.user.count_zones(), 2)
+
+
+class TestPurgeCacheMany(FakedServiceTestCase):
+    def setUp(self):
+        self.user = User.get(email='foo@example.net')
+        self.zones = self.user.zones
+
+    def test_purges_every_zone(self):
+        with patch.object(self.user._service, 'purge_cache') as purge_cache:
+            results = self.user.purge_cache_many(self.zones, tags=['t'])
+        self.assertEqual(list(results), [zone.id for zone in self.zones])
+        self.assertEqual(purge_cache.call_count, 2)
+        purge_cache.assert_any_call(
+            self.zones[0].id, files=None, tags=['t'], hosts=None)
+
+    def test_accepts_zone_ids(self):
+        results = self.user.purge_cache_many(['zone1', 'zone2'])
+        self.assertEqual(list(results), ['zone1', 'zone2'])
+
+    def test_reports_errors_per_zone(self):
+        error = Exception('failed')
+        with patch.object(self.user._service, 'purge_cache',
+                          side_effect=[error, None]):
+            results = self.user.purge_cache_many(
+                ['zone1', 'zone2'], max_workers=1)
+        self.assertIs(results['zone1'].error, error)
+        self.assertIsNone(results['zone2'].error)
+
+    def test_uses_rate_limiter(self):
+        rate_limiter = Mock()
+        self.user.purge_cache_many(self.zones, rate_limiter=rate_limiter)
+        self.assertEqual(rate_limiter.acquire.call_count, 2)
+
+
+class TestIterSSLVerificationInfo(FakedServiceTestCase):
+    def setUp(self):
+        self.user = User.get(email='foo@example.net')
+
+    def test_yields_info_per_zone(self):
+        results = list(self.user.iter_ssl_verification_info(self.user.zones))
+        self.assertEqual(
+            sorted(result.zone_id for result in results),
+            sorted(zone.id for zone in self.user.zones))
+        self.assertEqual(
+            set(result.result for result in results),
+            set(['ssl_verification_info']))
+
+    def test_marks_unavailable_zones(self):
+        data = {'errors': [{'code': 1001, 'msg': 'msg'}]}
+        unavailable = HTTPServiceError(
+            response=Mock(json=Mock(return_value=data)))
+        with patch.object(self.user._service, 'get_ssl_verification_info',
+                          side_effect=[unavailable]):
+            results = list(self.user.iter_ssl_verification_info(['zone1']))
+        self.assertIsInstance(results[0].error, SSLUnavailable)
+
+
+class TestIterZonesFilters(FakedServiceTestCase):
+    def setUp(self):
+        self.user = User.get(email='foo@example.net')
+
+    def test_filters_zones(self):
+        zones = list(self.user.iter_zones(name='example.org'))
+        self.assertEqual([zone.name for zone in zones], ['example.org'])
+        self.assertEqual(self.user.count_zones(status='pending'), 0)
+
+    def test_sets_page_size(self):
+        with patch.object(self.user._service, 'get_zones',
+                          wraps=self.user._service.get_zones) as get_zones:
+            list(self.user.iter_zones(per_page=1, status='active'))
+        get_zones.assert_any_call(page=2, per_page=1, status='active')
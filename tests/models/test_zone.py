@@ -1,9 +1,9 @@
-from mock import Mock
+from mock import Mock, patch
 from six import string_types
 from unittest import TestCase
 
-from pycloudflare.exceptions import SSLUnavailable
-from pycloudflare.models import PageRule, Record, User, Zone
+from pycloudflare.exceptions import RecordNotFound, SSLUnavailable
+from pycloudflare.models import PageRule, Record, User, Zone, re_verify_zones
 from pycloudflare.services import HTTPServiceError
 from tests import PatchMixin
 from tests.models import FakedServiceTestCase
@@ -76,6 +76,9 @@ class TestZoneRecords(FakedServiceTestCase):
         record = next(self.zone.iter_records())
         self.assertIsInstance(record, Record)
 
+    def test_count_records(self):
+        self.assertEqual(self.zone.count_records(), 1)
+
     def test_records_lists_records_by_name(self):
         self.assertIsInstance(self.zone.records, dict)
         self.assertIsInstance(self.zone.records['example.com'], list)
@@ -167,3 +170,282 @@ class TestPurgeZone(TestCase, PatchMixin):
             'zone_id', files=None, hosts=['host1', 'host2'],
             tags=['tag1', 'tag2']
         )
+
+
+class TestApplyRecords(FakedServiceTestCase):
+    def setUp(self):
+        self.user = User.get(email='foo@example.net')
+        self.zone = self.user.get_zone_by_name('example.com')
+        self.record = self.zone.records['example.com'][0]
+
+    def test_creates_records(self):
+        results = self.zone.apply_records([
+            ('create', {'name': 'a.example.com', 'record_type': 'A',
+                        'content': '127.0.0.1'}),
+            ('create', {'name': 'b.example.com', 'record_type': 'MX',
+                        'content': 'mail.net', 'priority': 10}),
+        ])
+        self.assertEqual([r.error for r in results], [None, None])
+        self.assertEqual(results[1].record.priority, 10)
+        self.assertEqual(self.zone.count_records(), 3)
+
+    def test_updates_cached_records(self):
+        records = self.zone.records
+        self.zone.apply_records([
+            ('create', {'name': 'a.example.com', 'record_type': 'A',
+                        'content': '127.0.0.1'}),
+            ('update', self.record, {'name': 'b.example.com'}),
+        ])
+        self.assertIs(self.zone.records, records)
+        self.assertEqual(sorted(records), ['a.example.com', 'b.example.com'])
+        self.assertIs(records['b.example.com'][0], self.record)
+
+    def test_deletes_records(self):
+        self.zone.apply_records([('delete', self.record)])
+        self.assertEqual(self.zone.records, {})
+        self.assertEqual(self.zone.count_records(), 0)
+
+    def test_reports_errors(self):
+        self.zone.apply_records([('delete', self.record)])
+        results = self.zone.apply_records([
+            ('delete', self.record),
+            ('create', {'name': 'a.example.com', 'record_type': 'A',
+                        'content': '127.0.0.1'}),
+        ])
+        self.assertIsInstance(results[0].error, Exception)
+        self.assertIsNone(results[0].record)
+        self.assertIsNone(results[1].error)
+        self.assertIn('a.example.com', self.zone.records)
+
+    def test_failed_updates_leave_records_unchanged(self):
+        self.zone._service.delete_dns_record(self.zone.id, self.record.id)
+        results = self.zone.apply_records([
+            ('update', self.record, {'content': '5.6.7.8'}),
+        ])
+        self.assertIsInstance(results[0].error, Exception)
+        self.assertEqual(self.record.content, '1.2.3.4')
+        self.assertEqual(self.record._changes(), {})
+
+    def test_rejects_unknown_changes(self):
+        results = self.zone.apply_records([('move', self.record)])
+        self.assertIsInstance(results[0].error, ValueError)
+
+
+class TestSyncRecords(FakedServiceTestCase):
+    def setUp(self):
+        self.user = User.get(email='foo@example.net')
+        self.zone = self.user.get_zone_by_name('example.com')
+        self.record = self.zone.records['example.com'][0]
+        self.mx = self.zone.create_record(
+            'example.com', 'MX', 'mail.net', priority=10)
+
+    def test_no_changes_for_matching_records(self):
+        plan = self.zone.sync_records([
+            {'name': 'example.com', 'type': 'A', 'content': '1.2.3.4'},
+            {'name': 'example.com', 'type': 'MX', 'content': 'mail.net',
+             'priority': 10},
+        ], dry_run=True)
+        self.assertEqual(plan, [])
+
+    def test_no_changes_for_matching_records_without_content(self):
+        plan = self.zone.sync_records([
+            {'name': 'example.com', 'type': 'A', 'content': '1.2.3.4'},
+            {'name': 'example.com', 'type': 'MX', 'priority': 10},
+        ], dry_run=True)
+        self.assertEqual(plan, [])
+
+    def test_updates_changed_fields(self):
+        plan = self.zone.sync_records([
+            {'name': 'example.com', 'type': 'A', 'content': '1.2.3.4',
+             'proxied': True},
+            {'name': 'example.com', 'type': 'MX', 'content': 'mail.net',
+             'priority': 10},
+        ], dry_run=True)
+        self.assertEqual(len(plan), 1)
+        self.assertEqual(plan[0][0], 'update')
+        self.assertEqual(plan[0][1].id, self.record.id)
+        self.assertEqual(plan[0][2], {'proxied': True})
+
+    def test_updates_content_in_place(self):
+        plan = self.zone.sync_records([
+            {'name': 'example.com', 'type': 'A', 'content': '5.6.7.8'},
+        ], dry_run=True)
+        self.assertEqual(
+            [(change[0], change[1].id) for change in plan],
+            [('delete', self.mx.id), ('update', self.record.id)])
+        self.assertEqual(plan[1][2], {'content': '5.6.7.8'})
+
+    def test_creates_missing_records(self):
+        plan = self.zone.sync_records([
+            {'name': 'example.com', 'type': 'A', 'content': '1.2.3.4'},
+            {'name': 'example.com', 'type': 'A', 'content': '5.6.7.8'},
+            {'name': 'example.com', 'type': 'MX', 'content': 'mail.net'},
+        ], dry_run=True)
+        self.assertEqual(plan, [('create', {
+            'name': 'example.com', 'record_type': 'A', 'content': '5.6.7.8'})])
+
+    def test_applies_plan(self):
+        results = self.zone.sync_records([
+            {'name': 'example.com', 'type': 'A', 'content': '5.6.7.8'},
+            {'name': 'www.example.com', 'type': 'CNAME',
+             'content': 'example.com'},
+        ])
+        self.assertEqual([r.error for r in results], [None, None, None])
+        records = sorted(
+            (r['name'], r['type'], r['content'])
+            for r in self.zone._service.get_dns_records(self.zone.id))
+        self.assertEqual(records, [
+            ('example.com', 'A', '5.6.7.8'),
+            ('www.example.com', 'CNAME', 'example.com'),
+        ])
+        self.assertEqual(sorted(self.zone.records),
+                         ['example.com', 'www.example.com'])
+
+
+class TestRecordIndex(FakedServiceTestCase):
+    def setUp(self):
+        self.user = User.get(email='foo@example.net')
+        self.zone = self.user.get_zone_by_name('example.com')
+        self.record = self.zone.records['example.com'][0]
+
+    def test_gets_record_by_id(self):
+        self.assertIs(self.zone.get_record(self.record.id), self.record)
+
+    def test_missing_record_raises(self):
+        self.assertRaises(RecordNotFound, self.zone.get_record, 'missing')
+
+    def test_gets_records_by_type(self):
+        cname = self.zone.create_record(
+            'www.example.com', 'CNAME', 'example.com')
+        self.assertEqual(self.zone.get_records_by_type('CNAME'), [cname])
+        self.assertEqual(self.zone.get_records_by_type('A'), [self.record])
+
+    def test_created_records_are_indexed_in_order(self):
+        records = self.zone.records
+        record = self.zone.create_record('example.com', 'A', '1.1.1.1')
+        self.assertIs(self.zone.records, records)
+        self.assertEqual(records['example.com'], [record, self.record])
+        self.assertIs(self.zone.get_record(record.id), record)
+
+
+class ReVerifyTestCase(TestCase, PatchMixin):
+    def setUp(self):
+        self.now = 1000.0
+        self.sleeps = []
+        self._patch('pycloudflare.models.time', side_effect=lambda: self.now)
+        self._patch('pycloudflare.models.sleep', side_effect=self._sleep)
+        self._patch('pycloudflare.models.CloudFlareService')
+        self.user = User('email', 'api_key')
+
+    def _sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+    def make_zone(self, zone_id, probes_until_unavailable):
+        zone = Zone(self.user, {'id': zone_id})
+        zone._service = Mock()
+        data = {'errors': [{'code': 1001, 'msg': 'msg'}]}
+        unavailable = HTTPServiceError(
+            response=Mock(json=Mock(return_value=data)))
+        zone._service.get_ssl_verification_info.side_effect = (
+            ['pending'] * (probes_until_unavailable - 1) + [unavailable])
+        return zone
+
+    def assert_re_enabled(self, zone):
+        self.assertEqual(
+            zone._service.update_ssl_universal_settings.call_args_list,
+            [((zone.id, {'enabled': False}),),
+             ((zone.id, {'enabled': True}),)])
+
+
+class TestReVerify(ReVerifyTestCase):
+    def test_re_enables_once_deprovisioned(self):
+        zone = self.make_zone('zone_id', 2)
+        zone.re_verify()
+        self.assert_re_enabled(zone)
+        self.assertEqual(self.sleeps, [1, 1, 1])
+
+
+class TestReVerifyZones(ReVerifyTestCase):
+    def test_re_verifies_zones_on_one_schedule(self):
+        zones = [self.make_zone('zone1', 1), self.make_zone('zone2', 3)]
+        results = re_verify_zones(zones)
+        for zone in zones:
+            self.assert_re_enabled(zone)
+            self.assertIsNone(results[zone.id].error)
+        # As long as the slowest zone alone
+        self.assertEqual(self.now, 1004.0)
+
+    def test_reports_errors_per_zone(self):
+        zones = [self.make_zone('zone1', 1), self.make_zone('zone2', 1)]
+        error = Exception('failed')
+        zones[0]._service.update_ssl_universal_settings.side_effect = error
+        results = re_verify_zones(zones)
+        self.assertIs(results['zone1'].error, error)
+        self.assert_re_enabled(zones[1])
+
+
+class TestLazyZone(FakedServiceTestCase):
+    def setUp(self):
+        self.user = User.get(email='foo@example.net')
+        self.zone_id = '9a7806061c88ada191ed06f989cc3dac'
+
+    def test_from_id_doesnt_request_zone(self):
+        with patch.object(self.user._service, 'get_zone') as get_zone:
+            zone = self.user.get_zone(self.zone_id)
+            self.assertEqual(zone.id, self.zone_id)
+            self.assertEqual(repr(zone), 'Zone<%s>' % self.zone_id)
+            self.assertIn('example.com', zone.records)
+            self.assertFalse(get_zone.called)
+
+    def test_hydrates_once_on_attribute_access(self):
+        zone = Zone.from_id(self.user, self.zone_id)
+        with patch.object(self.user._service, 'get_zone',
+                          wraps=self.user._service.get_zone) as get_zone:
+            self.assertEqual(zone.name, 'example.com')
+            self.assertEqual(zone.status, 'active')
+            get_zone.assert_called_once_with(self.zone_id)
+
+    def test_from_name_hydrates_for_id(self):
+        zone = Zone.from_name(self.user, 'example.com')
+        self.assertEqual(zone.name, 'example.com')
+        self.assertEqual(zone.id, self.zone_id)
+
+    def test_missing_attribute_raises(self):
+        zone = Zone.from_id(self.user, self.zone_id)
+        with self.assertRaises(AttributeError):
+            zone.nonexistent
+
+
+class TestFindRecords(FakedServiceTestCase):
+    def setUp(self):
+        self.user = User.get(email='foo@example.net')
+        self.zone = self.user.get_zone_by_name('example.com')
+        self.cname = self.zone.create_record(
+            'www.example.com', 'CNAME', 'example.com')
+
+    def test_finds_matching_records(self):
+        records = list(self.zone.find_records(record_type='CNAME'))
+        self.assertEqual([record.id for record in records], [self.cname.id])
+        self.assertEqual(
+            list(self.zone.find_records(name='www.example.com', proxied=True)),
+            [])
+
+    def test_counts_matching_records(self):
+        self.assertEqual(self.zone.count_records(record_type='A'), 1)
+
+    def test_gets_records_by_name_without_listing(self):
+        with patch.object(self.zone._service, 'get_dns_records',
+                          wraps=self.zone._service.get_dns_records) as get:
+            records = self.zone.get_records_by_name('www.example.com')
+        self.assertEqual([record.id for record in records], [self.cname.id])
+        get.assert_called_once_with(
+            self.zone.id, page=1, per_page=50, name='www.example.com',
+            record_type=None, content=None, proxied=None)
+
+    def test_gets_records_by_name_from_cached_records(self):
+        records = self.zone.records
+        with patch.object(self.zone._service, 'get_dns_records') as get:
+            self.assertEqual(self.zone.get_records_by_name('www.example.com'),
+                             records['www.example.com'])
+        self.assertFalse(get.called)
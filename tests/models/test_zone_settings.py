@@ -1,6 +1,8 @@
-from mock import patch
+from mock import Mock, patch
 
-from pycloudflare.models import User, ZoneSettings
+from pycloudflare.models import (
+    COMPLIANT, FAILED, SKIPPED, UPDATED, User, ZoneSettings,
+    iter_zone_settings, rollout_zone_settings, zone_settings_matrix)
 from tests.models import FakedServiceTestCase
 
 
@@ -53,3 +55,122 @@ class TestZoneSettings(FakedServiceTestCase):
             self.zone.settings.save()
             self.zone._service.set_zone_settings.assert_called_with(
                 self.zone.id, [{'id': 'always_online', 'value': 'off'}])
+
+
+class TestLazyZoneSettings(FakedServiceTestCase):
+    def setUp(self):
+        self.user = User.get(email='foo@example.net')
+        self.zone = self.user.get_zone_by_name('example.com')
+        self.service = self.zone._service
+
+    def test_reads_single_setting(self):
+        with patch.object(self.service, 'get_zone_settings') as get_all:
+            self.assertEqual(self.zone.settings.always_online, 'on')
+            self.assertEqual(self.zone.settings.always_online, 'on')
+            self.assertFalse(get_all.called)
+
+    def test_requests_setting_once(self):
+        with patch.object(self.service, 'get_zone_setting',
+                          wraps=self.service.get_zone_setting) as get:
+            self.zone.settings.always_online
+            self.zone.settings.always_online = 'off'
+            get.assert_called_once_with(self.zone.id, 'always_online')
+
+    def test_requests_unknown_setting_once(self):
+        with patch.object(self.service, 'get_zone_setting',
+                          wraps=self.service.get_zone_setting) as get:
+            self.assertFalse(hasattr(self.zone.settings, 'nonexistent'))
+            self.assertIsNone(
+                getattr(self.zone.settings, 'nonexistent', None))
+            get.assert_called_once_with(self.zone.id, 'nonexistent')
+
+    def test_iteration_skips_unknown_settings(self):
+        getattr(self.zone.settings, 'nonexistent', None)
+        self.assertEqual(
+            list(self.zone.settings), ['always_online', 'minify', 'ssl'])
+
+    def test_iteration_lists_all_settings(self):
+        self.assertEqual(
+            list(self.zone.settings), ['always_online', 'minify', 'ssl'])
+
+    def test_save_doesnt_reload_settings(self):
+        self.zone.settings.always_online = 'off'
+        with patch.object(self.service, 'get_zone_settings') as get_all, \
+                patch.object(self.service, 'get_zone_setting') as get:
+            self.zone.settings.save()
+            self.assertEqual(self.zone.settings.always_online, 'off')
+            self.assertFalse(get_all.called)
+            self.assertFalse(get.called)
+
+
+class TestIterZoneSettings(FakedServiceTestCase):
+    def setUp(self):
+        self.user = User.get(email='foo@example.net')
+        self.zones = self.user.zones
+
+    def test_caches_settings_of_zones(self):
+        results = list(iter_zone_settings(self.zones))
+        self.assertEqual(
+            sorted(result.zone_id for result in results),
+            sorted(zone.id for zone in self.zones))
+        with patch.object(self.user._service, 'get_zone_settings') as get:
+            for zone in self.zones:
+                self.assertEqual(zone.settings.always_online, 'on')
+            self.assertFalse(get.called)
+
+    def test_reports_errors_per_zone(self):
+        error = Exception('failed')
+        with patch.object(self.user._service, 'get_zone_settings',
+                          side_effect=error):
+            results = list(iter_zone_settings(self.zones[:1]))
+        self.assertIs(results[0].error, error)
+
+    def test_matrix(self):
+        rows = dict(
+            (row.zone_id, row.result) for row in zone_settings_matrix(
+                self.zones, ['always_online', 'nonexistent_setting']))
+        self.assertEqual(rows[self.zones[0].id], {
+            'always_online': 'on',
+            'nonexistent_setting': None,
+        })
+
+
+class TestRolloutZoneSettings(FakedServiceTestCase):
+    def setUp(self):
+        self.user = User.get(email='foo@example.net')
+        self.zones = sorted(self.user.zones, key=lambda zone: zone.id)
+
+    def test_updates_differing_settings(self):
+        self.zones[0].settings.always_online = 'off'
+        self.zones[0].settings.save()
+        with patch.object(self.user._service, 'set_zone_settings',
+                          wraps=self.user._service.set_zone_settings) as set_:
+            report = rollout_zone_settings(
+                self.zones, {'always_online': 'off'})
+            set_.assert_called_once_with(
+                self.zones[1].id, [{'id': 'always_online', 'value': 'off'}])
+        self.assertEqual(report[self.zones[0].id].status, COMPLIANT)
+        self.assertEqual(report[self.zones[1].id].status, UPDATED)
+        self.assertEqual(report[self.zones[1].id].changes,
+                         {'always_online': 'off'})
+        self.assertEqual(self.zones[1].settings.always_online, 'off')
+
+    def test_skips_zones_outside_canary(self):
+        report = rollout_zone_settings(
+            self.zones, {'always_online': 'off'}, canary=0)
+        self.assertEqual(
+            set(result.status for result in report.values()),
+            set([SKIPPED]))
+        self.assertEqual(self.zones[0].settings.always_online, 'on')
+
+    def test_reports_failures(self):
+        report = rollout_zone_settings(self.zones, {'nonexistent': 'on'})
+        for result in report.values():
+            self.assertEqual(result.status, FAILED)
+            self.assertIsInstance(result.error, AttributeError)
+
+    def test_uses_rate_limiter(self):
+        rate_limiter = Mock()
+        rollout_zone_settings(
+            self.zones, {'always_online': 'off'}, rate_limiter=rate_limiter)
+        self.assertEqual(rate_limiter.acquire.call_count, 2)
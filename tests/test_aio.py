@@ -0,0 +1,134 @@
+from unittest import SkipTest, TestCase
+
+from mock import Mock, patch
+from six import PY2
+
+from pycloudflare.models import Record, User
+from tests.models import FakedServiceTestCase
+
+if PY2:
+    raise SkipTest('asyncio requires Python 3')
+
+import asyncio  # noqa: E402
+
+from pycloudflare.aio import (  # noqa: E402
+    AsyncCloudFlareService, AsyncUser, AsyncZone)
+from pycloudflare.pool import ConnectionPool  # noqa: E402
+from pycloudflare.services import CloudFlareService  # noqa: E402
+
+
+class AsyncTestCase(FakedServiceTestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.addCleanup(self.loop.close)
+        self.user = AsyncUser(User.get(email='foo@example.net'))
+        self.addCleanup(self.user.close)
+
+    def run_until_complete(self, awaitable):
+        return self.loop.run_until_complete(awaitable)
+
+
+class TestAsyncCloudFlareService(TestCase):
+    def test_workers_are_limited_to_the_connection_pool(self):
+        service = CloudFlareService(
+            'api_key', 'email', connection_pool=ConnectionPool(pool_size=5))
+        async_service = AsyncCloudFlareService(service=service)
+        self.addCleanup(async_service.close)
+        self.assertEqual(async_service.max_workers, 5)
+
+    def test_pool_is_sized_for_the_workers(self):
+        async_service = AsyncCloudFlareService(
+            'api_key', 'email', max_workers=20)
+        self.addCleanup(async_service.close)
+        self.assertEqual(async_service.max_workers, 20)
+        self.assertEqual(async_service._service.connection_pool.pool_size, 20)
+
+    def test_closes_its_own_connection_pool(self):
+        async_service = AsyncCloudFlareService('api_key', 'email')
+        with patch.object(async_service._service.connection_pool,
+                          'close') as close:
+            async_service.close()
+        close.assert_called_once_with()
+
+    def test_leaves_wrapped_connection_pool_open(self):
+        pool = ConnectionPool()
+        service = CloudFlareService(
+            'api_key', 'email', connection_pool=pool)
+        async_service = AsyncCloudFlareService(service=service)
+        with patch.object(pool, 'close') as close:
+            async_service.close()
+        self.assertFalse(close.called)
+
+    def test_hooks_are_not_endpoints(self):
+        async_service = AsyncCloudFlareService('api_key', 'email')
+        self.addCleanup(async_service.close)
+        for hook in ('pre_send', 'is_acceptable', 'post_send',
+                     'dump_cached', 'load_cached'):
+            self.assertFalse(hasattr(async_service, hook), hook)
+        self.assertTrue(hasattr(async_service, 'get_zones'))
+
+
+class TestAsyncUser(AsyncTestCase):
+    def test_iter_zones_yields_async_zones(self):
+        zones = self.user.iter_zones()
+        zone = self.run_until_complete(zones.__anext__())
+        self.assertIsInstance(zone, AsyncZone)
+
+    def test_get_zones_returns_all_zones(self):
+        zones = self.run_until_complete(self.user.get_zones())
+        self.assertEqual(
+            sorted(zone.name for zone in zones),
+            ['example.com', 'example.org'])
+
+    def test_get_zone_by_name(self):
+        zone = self.run_until_complete(
+            self.user.get_zone_by_name('example.com'))
+        self.assertEqual(zone.name, 'example.com')
+
+    def test_many_requests_can_be_awaited_together(self):
+        names = ['example.com', 'example.org'] * 10
+        zones = self.run_until_complete(asyncio.gather(
+            *(self.user.get_zone_by_name(name) for name in names)))
+        self.assertEqual([zone.name for zone in zones], names)
+
+
+class TestAsyncZone(AsyncTestCase):
+    def setUp(self):
+        super(TestAsyncZone, self).setUp()
+        self.zone = self.run_until_complete(
+            self.user.get_zone_by_name('example.com'))
+
+    def test_get_records_lists_records_by_name(self):
+        records = self.run_until_complete(self.zone.get_records())
+        self.assertIsInstance(records['example.com'][0], Record)
+
+    def test_create_record(self):
+        record = self.run_until_complete(
+            self.zone.create_record('bar.example.com', 'A', '127.0.0.1'))
+        self.assertEqual(record.name, 'bar.example.com')
+
+    def test_doesnt_proxy_blocking_methods(self):
+        with self.assertRaises(AttributeError):
+            self.zone.records
+
+    def test_repr_able(self):
+        self.assertEqual(repr(self.zone), 'AsyncZone<example.com>')
+
+    def test_re_verify(self):
+        sleeps = []
+
+        def sleep(delay):
+            sleeps.append(delay)
+            future = self.loop.create_future()
+            future.set_result(None)
+            return future
+
+        service = self.zone.zone._service = Mock()
+        service.get_ssl_verification_info.return_value = 'pending'
+        with patch('pycloudflare.aio.asyncio.sleep', new=sleep):
+            self.run_until_complete(self.zone.re_verify())
+        self.assertEqual(
+            service.update_ssl_universal_settings.call_args_list[-1][0],
+            (self.zone.id, {'enabled': True}))
+        self.assertEqual(sleeps, [1] * 5)
@@ -0,0 +1,253 @@
+import shutil
+import tempfile
+from unittest import TestCase
+
+from mock import Mock
+
+from pycloudflare.cache import MemoryCache, SQLiteCache, get_endpoint
+from pycloudflare.models import User
+from pycloudflare.services import CloudFlareService, ResultList, ZoneNotFound
+from tests import PatchMixin
+
+
+def api_response(result, result_info=None):
+    data = {'result': result}
+    if result_info:
+        data['result_info'] = result_info
+    return Mock(status_code=200, json=Mock(return_value=data))
+
+
+class TestGetEndpoint(TestCase):
+    def test_recognizes_listings(self):
+        self.assertEqual(get_endpoint('zones'), 'zones')
+        self.assertEqual(get_endpoint('zones/id/dns_records'), 'dns_records')
+        self.assertEqual(get_endpoint('zones/id/pagerules'), 'page_rules')
+        self.assertEqual(get_endpoint('zones/id/settings'), 'zone_settings')
+
+    def test_recognizes_lookups(self):
+        self.assertEqual(get_endpoint('zones/id'), 'zone')
+        self.assertEqual(get_endpoint('zones/id/settings/ssl'), 'zone_setting')
+        self.assertEqual(
+            get_endpoint('zones/id/custom_hostnames'), 'custom_hostnames')
+
+    def test_ignores_other_paths(self):
+        self.assertIsNone(get_endpoint('zones/id/dns_records/record_id'))
+
+
+class TestMemoryCache(TestCase, PatchMixin):
+    def setUp(self):
+        self.now = 1000.0
+        self._patch('pycloudflare.cache.time', side_effect=lambda: self.now)
+        self.cache = MemoryCache(max_entries=2)
+
+    def test_returns_copy_of_cached_value(self):
+        value = {'a': [1]}
+        self.cache.set('key', 'scope', value, 10)
+        value['a'].append(2)
+        cached = self.cache.get('key')
+        self.assertEqual(cached, {'a': [1]})
+        cached['a'].append(3)
+        self.assertEqual(self.cache.get('key'), {'a': [1]})
+
+    def test_expires_values(self):
+        self.cache.set('key', 'scope', 'value', 10)
+        self.now += 10
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_evicts_least_recently_used(self):
+        self.cache.set('key1', 'scope', 'value1', 10)
+        self.cache.set('key2', 'scope', 'value2', 10)
+        self.cache.get('key1')
+        self.cache.set('key3', 'scope', 'value3', 10)
+        self.assertEqual(self.cache.get('key1'), 'value1')
+        self.assertIsNone(self.cache.get('key2'))
+
+    def test_invalidates_scope(self):
+        self.cache.set('key1', 'scope1', 'value1', 10)
+        self.cache.set('key2', 'scope2', 'value2', 10)
+        self.cache.invalidate('scope1')
+        self.assertIsNone(self.cache.get('key1'))
+        self.assertEqual(self.cache.get('key2'), 'value2')
+
+    def test_counts_hits_and_misses(self):
+        self.cache.get('key')
+        self.cache.set('key', 'scope', 'value', 10)
+        self.cache.get('key')
+        self.cache.get('key')
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 1))
+
+
+class SQLiteCacheTestCase(TestCase, PatchMixin):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.now = 1000.0
+        self._patch('pycloudflare.cache.time', side_effect=lambda: self.now)
+        self.cache = SQLiteCache(directory, max_entries=2)
+        self.addCleanup(self.cache.close)
+
+
+class TestSQLiteCache(SQLiteCacheTestCase):
+    def test_returns_cached_value(self):
+        self.cache.set('key', 'scope', {'a': [1]}, 10)
+        self.assertEqual(self.cache.get('key'), {'a': [1]})
+
+    def test_expires_values(self):
+        self.cache.set('key', 'scope', 'value', 10)
+        self.now += 10
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_evicts_least_recently_used(self):
+        self.cache.set('key1', 'scope', 'value1', 10)
+        self.now += 1
+        self.cache.set('key2', 'scope', 'value2', 10)
+        self.now += 1
+        self.cache.get('key1')
+        self.now += 1
+        self.cache.set('key3', 'scope', 'value3', 10)
+        self.assertEqual(self.cache.get('key1'), 'value1')
+        self.assertIsNone(self.cache.get('key2'))
+
+    def test_invalidates_scope(self):
+        self.cache.set('key1', 'scope1', 'value1', 10)
+        self.cache.set('key2', 'scope2', 'value2', 10)
+        self.cache.invalidate('scope1')
+        self.assertIsNone(self.cache.get('key1'))
+        self.assertEqual(self.cache.get('key2'), 'value2')
+
+
+class TestServiceCaching(SQLiteCacheTestCase):
+    def setUp(self):
+        super(TestServiceCaching, self).setUp()
+        self.cache.max_entries = 100
+        self.request = self._patch('requests.Session.request')
+        self.service = CloudFlareService('api_key', 'email', cache=self.cache)
+
+    def test_caches_listings(self):
+        self.request.return_value = api_response(
+            [{'id': 'record_id'}], {'page': 1, 'total_pages': 1})
+        self.service.get_dns_records('zone_id')
+        records = self.service.get_dns_records('zone_id')
+        self.assertEqual(self.request.call_count, 1)
+        self.assertIsInstance(records, ResultList)
+        self.assertEqual(records, [{'id': 'record_id'}])
+        self.assertEqual(records.result_info['total_pages'], 1)
+
+    def test_pages_are_cached_separately(self):
+        self.request.return_value = api_response([])
+        self.service.get_zones(page=1)
+        self.service.get_zones(page=2)
+        self.assertEqual(self.request.call_count, 2)
+
+    def test_credentials_are_cached_separately(self):
+        self.request.return_value = api_response([])
+        self.service.get_zones()
+        CloudFlareService('other_key', 'email', cache=self.cache).get_zones()
+        self.assertEqual(self.request.call_count, 2)
+
+    def test_doesnt_cache_other_endpoints(self):
+        self.request.return_value = api_response({'id': 'zone_id'})
+        self.service.get_zone('zone_id')
+        self.service.get_zone('zone_id')
+        self.assertEqual(self.request.call_count, 2)
+
+    def test_writes_invalidate_zone(self):
+        self.request.return_value = api_response([])
+        self.service.get_dns_records('zone_id')
+        self.service.get_zone_settings('zone_id')
+        self.service.delete_dns_record('zone_id', 'record_id')
+        self.service.get_dns_records('zone_id')
+        self.service.get_zone_settings('zone_id')
+        self.assertEqual(self.request.call_count, 5)
+
+    def test_zone_writes_invalidate_zones(self):
+        self.request.return_value = api_response([])
+        self.service.get_zones()
+        self.service.delete_zone('zone_id')
+        self.service.get_zones()
+        self.assertEqual(self.request.call_count, 3)
+
+    def test_invalidates_listings_read_during_write(self):
+        def request(method, url, **kwargs):
+            if method == 'DELETE':
+                # Another process lists the records while one is deleted
+                self.service.get_dns_records('zone_id')
+            return api_response([])
+
+        self.request.side_effect = request
+        self.service.delete_dns_record('zone_id', 'record_id')
+        self.service.get_dns_records('zone_id')
+        self.assertEqual(self.request.call_count, 3)
+
+
+class HostZoneCachingMixin(PatchMixin):
+    def setUp(self):
+        super(HostZoneCachingMixin, self).setUp()
+        self.zones = []
+        self.request = self._patch(
+            'requests.Session.request', side_effect=self.respond)
+        self._patch(User, 'get_host_service')
+        self._patch(User, 'service_options', {'cache': self.cache})
+        self.user = User('foo@example.net', 'api_key')
+
+    def respond(self, method, url, **kwargs):
+        if 'zones?name=' in url:
+            return api_response(self.zones)
+        return api_response([])
+
+    def test_host_zones_invalidate_zone_lookups(self):
+        with self.assertRaises(ZoneNotFound):
+            self.user.get_zone_by_name('new.com')
+        self.zones.append({'id': 'zone_id', 'name': 'new.com'})
+        zone = self.user.create_host_zone('new.com')
+        self.assertEqual(zone.id, 'zone_id')
+
+
+class TestSQLiteHostZoneCaching(HostZoneCachingMixin, SQLiteCacheTestCase):
+    pass
+
+
+class TestMemoryHostZoneCaching(HostZoneCachingMixin, TestCase):
+    def setUp(self):
+        self.cache = MemoryCache()
+        super(TestMemoryHostZoneCaching, self).setUp()
+
+
+class TestServiceMemoryCaching(TestCase, PatchMixin):
+    def setUp(self):
+        self.request = self._patch('requests.Session.request')
+        self.cache = MemoryCache()
+        self.service = CloudFlareService('api_key', 'email', cache=self.cache)
+
+    def test_caches_lookups(self):
+        self.request.return_value = api_response({'id': 'zone_id'})
+        self.service.get_zone('zone_id')
+        self.assertEqual(self.service.get_zone('zone_id'), {'id': 'zone_id'})
+        self.request.return_value = api_response([{'id': 'hostname_id'}])
+        self.service.get_custom_hostname_by_name('zone_id', 'example.com')
+        self.service.get_custom_hostname_by_name('zone_id', 'example.com')
+        self.assertEqual(self.request.call_count, 2)
+        self.assertEqual(self.cache.hits, 2)
+
+    def test_writes_invalidate_setting(self):
+        self.request.return_value = api_response({'id': 'ssl'})
+        self.service.get_zone_setting('zone_id', 'ssl')
+        self.service.set_zone_setting('zone_id', 'ssl', 'full')
+        self.service.get_zone_setting('zone_id', 'ssl')
+        self.assertEqual(self.request.call_count, 3)
+
+    def test_invalidates_reads_made_during_write(self):
+        read_responses = []
+
+        def request(method, url, **kwargs):
+            if method == 'PATCH':
+                # Another thread reads the setting while it's being written
+                read_responses.append(
+                    self.service.get_zone_setting('zone_id', 'ssl'))
+            return api_response({'id': 'ssl'})
+
+        self.request.side_effect = request
+        self.service.set_zone_setting('zone_id', 'ssl', 'full')
+        self.service.get_zone_setting('zone_id', 'ssl')
+        self.assertEqual(len(read_responses), 1)
+        self.assertEqual(self.request.call_count, 3)
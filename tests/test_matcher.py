@@ -0,0 +1,97 @@
+from unittest import TestCase
+
+from mock import Mock
+
+from pycloudflare.matcher import PageRuleMatcher
+from pycloudflare.models import User
+from tests.models import FakedServiceTestCase
+
+
+def page_rule(pattern, priority=1, status='active', operator='matches'):
+    return Mock(priority=priority, status=status, targets=[{
+        'target': 'url',
+        'constraint': {'operator': operator, 'value': pattern},
+    }])
+
+
+class TestPageRuleMatcher(TestCase):
+    def setUp(self):
+        self.images = page_rule('*example.com/images/*', priority=2)
+        self.root = page_rule('example.com/*', priority=1)
+        self.secure = page_rule('https://www.example.com/*', priority=3)
+        self.matcher = PageRuleMatcher([self.root, self.images, self.secure])
+
+    def test_matches_wildcards(self):
+        self.assertIs(self.matcher.match('example.com/about'), self.root)
+        self.assertIs(
+            self.matcher.match('http://cdn.example.com/images/a.png'),
+            self.images)
+
+    def test_matches_wildcards_in_host(self):
+        rule = page_rule('example.com*')
+        matcher = PageRuleMatcher([rule])
+        self.assertIs(matcher.match('http://example.com/page'), rule)
+        self.assertIs(matcher.match('http://example.com'), rule)
+        self.assertIsNone(matcher.match('http://www.example.com/page'))
+
+    def test_matches_wildcards_around_host(self):
+        rule = page_rule('*example.com*')
+        matcher = PageRuleMatcher([rule])
+        self.assertIs(matcher.match('http://www.example.com/page'), rule)
+        self.assertIs(matcher.match('https://example.com/'), rule)
+        self.assertIsNone(matcher.match('http://example.net/'))
+
+    def test_matches_host_without_path_on_root(self):
+        rule = page_rule('example.com')
+        matcher = PageRuleMatcher([rule])
+        self.assertIs(matcher.match('http://example.com/'), rule)
+        self.assertIsNone(matcher.match('http://example.com/page'))
+
+    def test_prefers_highest_priority(self):
+        self.assertEqual(
+            self.matcher.match_all('http://example.com/images/a.png'),
+            [self.images, self.root])
+
+    def test_matches_host_case_insensitively(self):
+        self.assertIs(self.matcher.match('http://EXAMPLE.com/'), self.root)
+
+    def test_matches_path_case_sensitively(self):
+        self.assertIsNone(self.matcher.match('cdn.example.com/IMAGES/a.png'))
+
+    def test_matches_scheme(self):
+        self.assertIs(
+            self.matcher.match('https://www.example.com/'), self.secure)
+        self.assertIsNone(self.matcher.match('http://www.example.com/'))
+
+    def test_matches_root_path(self):
+        self.assertIs(self.matcher.match('http://example.com'), self.root)
+
+    def test_doesnt_match_other_hosts(self):
+        self.assertIsNone(self.matcher.match('http://example.net/'))
+
+    def test_ignores_disabled_rules(self):
+        disabled = page_rule('example.net/*', status='disabled')
+        self.assertIsNone(
+            PageRuleMatcher([disabled]).match('example.net/'))
+        self.assertIs(
+            PageRuleMatcher([disabled], include_disabled=True).match(
+                'example.net/'),
+            disabled)
+
+    def test_ignores_other_operators(self):
+        rule = page_rule('example.net/*', operator='contains')
+        self.assertIsNone(PageRuleMatcher([rule]).match('example.net/'))
+
+    def test_matches_many(self):
+        urls = ['example.com/', 'example.net/']
+        self.assertEqual(list(self.matcher.match_many(urls)),
+                         [('example.com/', self.root), ('example.net/', None)])
+
+
+class TestZonePageRuleMatcher(FakedServiceTestCase):
+    def test_matches_zone_page_rules(self):
+        zone = User.get(email='foo@example.net').get_zone_by_name(
+            'example.com')
+        matcher = zone.get_page_rule_matcher()
+        self.assertIs(matcher.match('http://example.com/images/logo.png'),
+                      zone.page_rules[0])
@@ -0,0 +1,94 @@
+import socket
+from unittest import TestCase
+
+from pycloudflare.models import User
+from pycloudflare.pool import (
+    DEFAULT_POOL_OPTIONS, ConnectionPool, KeepAliveAdapter,
+    close_connection_pools, configure_connection_pools, get_connection_pool)
+from pycloudflare.services import CloudFlareService
+from tests import PatchMixin
+
+
+class PoolTestCase(TestCase):
+    def setUp(self):
+        close_connection_pools()
+        self.addCleanup(close_connection_pools)
+        self.addCleanup(configure_connection_pools, **DEFAULT_POOL_OPTIONS)
+
+
+class TestSharedConnectionPools(PoolTestCase):
+    def test_services_with_same_credentials_share_adapter(self):
+        service1 = CloudFlareService('api_key', 'email')
+        service2 = CloudFlareService('api_key', 'email')
+        self.assertIs(service1.get_adapter('https://api.cloudflare.com/'),
+                      service2.get_adapter('https://api.cloudflare.com/'))
+
+    def test_services_with_other_credentials_dont_share_adapter(self):
+        service1 = CloudFlareService('api_key', 'email')
+        service2 = CloudFlareService('other_key', 'other_email')
+        self.assertIsNot(service1.get_adapter('https://api.cloudflare.com/'),
+                         service2.get_adapter('https://api.cloudflare.com/'))
+
+    def test_services_can_use_own_pool(self):
+        pool = ConnectionPool(pool_size=2)
+        service = CloudFlareService('api_key', 'email', connection_pool=pool)
+        self.assertIs(
+            service.get_adapter('https://api.cloudflare.com/'), pool.adapter)
+
+    def test_configures_new_pools(self):
+        configure_connection_pools(pool_size=42, max_retries=3)
+        pool = get_connection_pool('key')
+        self.assertEqual(pool.pool_size, 42)
+        self.assertEqual(pool.max_retries, 3)
+
+    def test_rejects_unknown_options(self):
+        with self.assertRaises(TypeError):
+            configure_connection_pools(pool_sise=42)
+
+    def test_service_requests_use_pool_max_retries(self):
+        configure_connection_pools(max_retries=3)
+        service = CloudFlareService('api_key', 'email')
+        self.assertEqual(service._shared_request_params['max_retries'], 3)
+
+    def test_close_forgets_pools(self):
+        pool = get_connection_pool('key')
+        close_connection_pools()
+        self.assertIsNot(get_connection_pool('key'), pool)
+
+
+class TestKeepAliveAdapter(TestCase):
+    def test_enables_keep_alive(self):
+        adapter = KeepAliveAdapter(keep_alive=30)
+        options = adapter.poolmanager.connection_pool_kw['socket_options']
+        self.assertIn((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1), options)
+
+    def test_keep_alive_can_be_disabled(self):
+        adapter = KeepAliveAdapter(keep_alive=None)
+        self.assertNotIn(
+            'socket_options', adapter.poolmanager.connection_pool_kw)
+
+
+class TestUserHostService(PoolTestCase, PatchMixin):
+    def setUp(self):
+        super(TestUserHostService, self).setUp()
+        self.host_service_mock = self._patch(
+            'pycloudflare.models.CloudFlareHostService')
+        self._patch(User, '_host_service', None)
+
+    def test_is_created_once(self):
+        self.assertIs(User.get_host_service(), User.get_host_service())
+        self.assertEqual(self.host_service_mock.call_count, 1)
+
+    def test_is_stored_on_the_class(self):
+        class HostUser(User):
+            pass
+
+        self.assertIs(HostUser.get_host_service(), HostUser._host_service)
+        self.assertIsNone(User._host_service)
+
+    def test_can_be_overridden(self):
+        class HostUser(User):
+            _host_service = object()
+
+        self.assertIs(HostUser.get_host_service(), HostUser._host_service)
+        self.assertEqual(self.host_service_mock.call_count, 0)
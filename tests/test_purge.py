@@ -0,0 +1,79 @@
+from unittest import TestCase
+
+from mock import Mock, call
+
+from pycloudflare.models import User, Zone
+from pycloudflare.purge import PurgeQueue
+from tests import PatchMixin
+
+
+class TestPurgeQueue(TestCase):
+    def setUp(self):
+        self.service = Mock()
+        self.queue = PurgeQueue(self.service, delay=60, max_items=2)
+        self.addCleanup(self.queue.close)
+
+    def test_coalesces_purges(self):
+        self.queue.purge('zone_id', files=['a'])
+        self.queue.purge('zone_id', files=['b'], tags=['t'])
+        self.queue.close()
+        self.service.purge_cache.assert_has_calls([
+            call('zone_id', files=['a', 'b']),
+            call('zone_id', tags=['t']),
+        ], any_order=True)
+        self.assertEqual(self.service.purge_cache.call_count, 2)
+
+    def test_deduplicates_and_chunks(self):
+        self.queue.purge('zone_id', files=['a', 'b', 'a', 'c'])
+        self.queue.purge('zone_id', files=['c'])
+        self.queue.close()
+        self.service.purge_cache.assert_has_calls([
+            call('zone_id', files=['a', 'b']),
+            call('zone_id', files=['c']),
+        ], any_order=True)
+        self.assertEqual(self.service.purge_cache.call_count, 2)
+
+    def test_purge_everything_supersedes(self):
+        self.queue.purge('zone_id', files=['a'])
+        self.queue.purge('zone_id')
+        self.queue.close()
+        self.service.purge_cache.assert_called_once_with('zone_id')
+
+    def test_purges_zones_separately(self):
+        self.queue.purge('zone1', hosts=['h'])
+        self.queue.purge('zone2', hosts=['h'])
+        self.queue.close()
+        self.assertEqual(self.service.purge_cache.call_count, 2)
+
+    def test_resolves_futures(self):
+        future = self.queue.purge('zone_id', files=['a'])
+        self.assertFalse(future.done())
+        self.queue.close()
+        self.assertIsNone(future.result())
+
+    def test_reports_errors(self):
+        error = Exception('failed')
+        self.service.purge_cache.side_effect = error
+        future = self.queue.purge('zone_id', files=['a'])
+        self.queue.close()
+        self.assertIs(future.exception(), error)
+
+    def test_flushes_after_delay(self):
+        queue = PurgeQueue(self.service, delay=0)
+        queue.purge('zone_id', files=['a']).result(timeout=5)
+        self.service.purge_cache.assert_called_once_with(
+            'zone_id', files=['a'])
+
+
+class TestZonePurgeQueue(TestCase, PatchMixin):
+    def setUp(self):
+        self.service_mock = self._patch(
+            'pycloudflare.models.CloudFlareService')
+        self.zone = Zone(User('email', 'api_key'), {'id': 'zone_id'})
+
+    def test_queues_purge(self):
+        queue = Mock()
+        self.zone.purge_cache(files=['a'], queue=queue)
+        queue.purge.assert_called_once_with(
+            'zone_id', files=['a'], tags=None, hosts=None)
+        self.assertFalse(self.service_mock.return_value.purge_cache.called)
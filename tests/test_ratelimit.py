@@ -0,0 +1,120 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from mock import Mock
+
+from pycloudflare.ratelimit import FileBackend, RateLimiter
+from pycloudflare.services import CloudFlareService
+from tests import PatchMixin
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def response(status_code=200, **headers):
+    return Mock(status_code=status_code, headers=headers)
+
+
+class RateLimiterTestCase(TestCase, PatchMixin):
+    def setUp(self):
+        self.clock = FakeClock()
+        self._patch('pycloudflare.ratelimit.time', side_effect=self.clock.time)
+        self._patch(
+            'pycloudflare.ratelimit.sleep', side_effect=self.clock.sleep)
+        self.limiter = RateLimiter(rate=60, period=60, burst=10)
+
+
+class TestRateLimiter(RateLimiterTestCase):
+    def test_allows_bursts(self):
+        for _ in range(10):
+            self.limiter.acquire()
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_waits_once_burst_is_used(self):
+        for _ in range(11):
+            self.limiter.acquire()
+        self.assertEqual(len(self.clock.sleeps), 1)
+        self.assertAlmostEqual(self.clock.sleeps[0], 60.0 / 50)
+
+    def test_stays_within_budget(self):
+        for _ in range(120):
+            self.limiter.acquire()
+        # 60 requests per 60 seconds, after the first one
+        self.assertGreaterEqual(self.clock.now - 1000.0, 60.0)
+
+    def test_rejects_invalid_burst(self):
+        self.assertRaises(ValueError, RateLimiter, rate=10, burst=10)
+
+    def test_reports_usage(self):
+        self.limiter.acquire()
+        usage = self.limiter.usage()
+        self.assertEqual(usage['capacity'], 10)
+        self.assertEqual(usage['used'], 1)
+        self.assertEqual(usage['available'], 9)
+
+
+class TestRateLimiterHeaders(RateLimiterTestCase):
+    def test_honours_retry_after(self):
+        self.limiter.update(response(429, **{'Retry-After': '30'}))
+        self.assertEqual(self.limiter.usage()['blocked_for'], 30)
+        self.limiter.acquire()
+        self.assertEqual(self.clock.now, 1030.0)
+
+    def test_empties_bucket_on_429(self):
+        self.limiter.update(response(429))
+        self.assertEqual(self.limiter.usage()['available'], 0)
+
+    def test_uses_remaining_header(self):
+        self.limiter.update(response(**{'X-RateLimit-Remaining': '2'}))
+        self.assertEqual(self.limiter.usage()['available'], 2)
+
+    def test_ignores_responses_without_headers(self):
+        self.limiter.update(response())
+        self.assertEqual(self.limiter.usage()['available'], 10)
+
+
+class TestFileBackend(RateLimiterTestCase):
+    def setUp(self):
+        super(TestFileBackend, self).setUp()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'bucket')
+
+    def test_shares_bucket_between_limiters(self):
+        limiter1 = RateLimiter(
+            rate=60, burst=10, backend=FileBackend(self.path))
+        limiter2 = RateLimiter(
+            rate=60, burst=10, backend=FileBackend(self.path))
+        for _ in range(5):
+            limiter1.acquire()
+        self.assertEqual(limiter2.usage()['available'], 5)
+
+
+class TestServiceRateLimiting(TestCase, PatchMixin):
+    def setUp(self):
+        self.limiter = Mock()
+        self.service = CloudFlareService(
+            'api_key', 'email', rate_limiter=self.limiter)
+        self._patch('requests.Session.request',
+                    return_value=Mock(status_code=200, json=Mock(
+                        return_value={'result': {}})))
+
+    def test_requests_acquire_token(self):
+        self.service.get_zone('zone_id')
+        self.limiter.acquire.assert_called_once_with()
+
+    def test_responses_update_limiter(self):
+        self.service.get_zone('zone_id')
+        self.assertEqual(self.limiter.update.call_count, 1)
@@ -0,0 +1,119 @@
+from unittest import TestCase
+
+from demands import HTTPServiceError
+from mock import Mock, patch
+from requests.exceptions import ConnectionError
+
+from pycloudflare.retry import RetryPolicy
+from pycloudflare.services import CloudFlareHostService, CloudFlareService
+from tests import PatchMixin
+
+
+def service_error(status_code, **headers):
+    return HTTPServiceError(Mock(
+        status_code=status_code, headers=headers, url='url',
+        json=Mock(return_value={})))
+
+
+class RetryTestCase(TestCase, PatchMixin):
+    def setUp(self):
+        self.now = 1000.0
+        self.sleeps = []
+        self._patch('pycloudflare.retry.time', side_effect=lambda: self.now)
+        self._patch('pycloudflare.retry.sleep', side_effect=self._sleep)
+        self.on_attempt = Mock()
+        self.policy = RetryPolicy(
+            max_attempts=3, backoff=1, deadline=60,
+            on_attempt=self.on_attempt)
+
+    def _sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestRetryPolicy(RetryTestCase):
+    def test_returns_result(self):
+        send = Mock(return_value='result')
+        self.assertEqual(self.policy.call(send, 'GET', 'zones'), 'result')
+        self.assertEqual(self.sleeps, [])
+
+    def test_retries_transient_errors(self):
+        send = Mock(side_effect=[
+            service_error(503), ConnectionError(), 'result'])
+        self.assertEqual(self.policy.call(send, 'GET', 'zones'), 'result')
+        self.assertEqual(send.call_count, 3)
+
+    def test_backs_off_exponentially(self):
+        self._patch('pycloudflare.retry.uniform', side_effect=lambda a, b: b)
+        send = Mock(side_effect=service_error(500))
+        self.assertRaises(
+            HTTPServiceError, self.policy.call, send, 'GET', 'zones')
+        self.assertEqual(self.sleeps, [1, 2])
+
+    def test_honours_retry_after(self):
+        send = Mock(side_effect=[
+            service_error(429, **{'Retry-After': '10'}), 'result'])
+        self.policy.call(send, 'DELETE', 'zones/zone_id')
+        self.assertGreaterEqual(self.sleeps[0], 10)
+
+    def test_doesnt_retry_client_errors(self):
+        send = Mock(side_effect=service_error(400))
+        self.assertRaises(
+            HTTPServiceError, self.policy.call, send, 'GET', 'zones')
+        self.assertEqual(send.call_count, 1)
+
+    def test_doesnt_retry_post(self):
+        send = Mock(side_effect=service_error(503))
+        self.assertRaises(
+            HTTPServiceError, self.policy.call, send, 'POST', 'zones')
+        self.assertEqual(send.call_count, 1)
+
+    def test_retries_idempotent_post(self):
+        send = Mock(side_effect=[service_error(503), 'result'])
+        self.assertEqual(
+            self.policy.call(send, 'POST', 'gw', idempotent=True), 'result')
+
+    def test_gives_up_at_deadline(self):
+        send = Mock(side_effect=service_error(429, **{'Retry-After': '90'}))
+        self.assertRaises(
+            HTTPServiceError, self.policy.call, send, 'GET', 'zones')
+        self.assertEqual(send.call_count, 1)
+
+    def test_reports_attempts(self):
+        error = service_error(503)
+        send = Mock(side_effect=[error, 'result'])
+        self.policy.call(send, 'GET', 'zones')
+        self.on_attempt.assert_any_call('GET', 'zones', 1, 0, error)
+        self.on_attempt.assert_any_call('GET', 'zones', 2, 0, None)
+
+
+class TestServiceRetries(RetryTestCase):
+    def setUp(self):
+        super(TestServiceRetries, self).setUp()
+        self.request = self._patch(
+            'requests.Session.request', side_effect=[
+                Mock(status_code=503, headers={}),
+                Mock(status_code=200, json=Mock(return_value={
+                    'result': {'id': 'zone_id'}})),
+            ])
+
+    def test_retries_requests(self):
+        service = CloudFlareService(
+            'api_key', 'email', retry_policy=self.policy)
+        self.assertEqual(service.get_zone('zone_id'), {'id': 'zone_id'})
+        self.assertEqual(self.request.call_count, 2)
+
+    def test_doesnt_retry_without_policy(self):
+        service = CloudFlareService('api_key', 'email')
+        self.assertRaises(HTTPServiceError, service.get_zone, 'zone_id')
+
+    @patch('pycloudflare.services.get_config',
+           return_value={'api_key': 'host_key'})
+    def test_retries_host_lookups(self, get_config):
+        self.request.side_effect = [
+            Mock(status_code=503, headers={}),
+            Mock(status_code=200, json=Mock(return_value={
+                'result': 'success', 'response': 'user'})),
+        ]
+        service = CloudFlareHostService(retry_policy=self.policy)
+        self.assertEqual(service.user_lookup(email='email'), 'user')
@@ -1,6 +1,11 @@
+from threading import Lock
 from unittest import TestCase
 
-from pycloudflare.services import CloudFlareService
+from mock import Mock
+
+from pycloudflare.services import (
+    CloudFlareService, PrefetchingPaginatedResults, ResultList,
+    cloudflare_paginated_results)
 from tests import PatchMixin
 
 
@@ -22,3 +27,132 @@ class TestPurgeZoneCache(TestCase, PatchMixin):
             'zones/zone_id/purge_cache',
             json={'hosts': ['h1', 'h2'], 'tags': ['t1', 't2']}
         )
+
+
+class TestPostSend(TestCase):
+    def setUp(self):
+        self.service = CloudFlareService('api_key', 'email')
+        self.response = Mock(status_code=200)
+
+    def test_unwraps_result(self):
+        self.response.json.return_value = {'result': {'id': 'zone_id'}}
+        self.assertEqual(
+            self.service.post_send(self.response), {'id': 'zone_id'})
+
+    def test_keeps_result_info_of_listings(self):
+        result_info = {'page': 1, 'total_pages': 3}
+        self.response.json.return_value = {
+            'result': [{'id': 'zone_id'}],
+            'result_info': result_info,
+        }
+        result = self.service.post_send(self.response)
+        self.assertIsInstance(result, ResultList)
+        self.assertEqual(result, [{'id': 'zone_id'}])
+        self.assertEqual(result.result_info, result_info)
+
+
+class FakePaginatedEndpoint(object):
+    def __init__(self, count, with_result_info=True):
+        self.items = list(range(count))
+        self.with_result_info = with_result_info
+        self.pages_requested = []
+        self.lock = Lock()
+
+    def __call__(self, page=1, per_page=50):
+        with self.lock:
+            self.pages_requested.append(page)
+        start = (page - 1) * per_page
+        items = self.items[start:start + per_page]
+        if not self.with_result_info:
+            return items
+        return ResultList(items, {
+            'page': page,
+            'per_page': per_page,
+            'count': len(items),
+            'total_count': len(self.items),
+            'total_pages': -(-len(self.items) // per_page),
+        })
+
+
+class TestPrefetchingPaginatedResults(TestCase):
+    def test_yields_items_in_order(self):
+        endpoint = FakePaginatedEndpoint(420)
+        results = cloudflare_paginated_results(endpoint, max_workers=4)
+        self.assertEqual(list(results), endpoint.items)
+
+    def test_fetches_only_total_pages(self):
+        endpoint = FakePaginatedEndpoint(200)
+        list(cloudflare_paginated_results(endpoint, max_workers=8))
+        self.assertEqual(sorted(endpoint.pages_requested), [1, 2, 3, 4])
+
+    def test_yields_items_in_order_without_result_info(self):
+        endpoint = FakePaginatedEndpoint(420, with_result_info=False)
+        results = cloudflare_paginated_results(endpoint, max_workers=4)
+        self.assertEqual(list(results), endpoint.items)
+
+    def test_single_page(self):
+        endpoint = FakePaginatedEndpoint(10)
+        results = cloudflare_paginated_results(endpoint, max_workers=4)
+        self.assertEqual(list(results), endpoint.items)
+        self.assertEqual(endpoint.pages_requested, [1])
+
+    def test_uses_plain_pagination_without_max_workers(self):
+        results = cloudflare_paginated_results(FakePaginatedEndpoint(10))
+        self.assertNotIsInstance(results, PrefetchingPaginatedResults)
+
+
+class TestCloudFlarePaginatedResults(TestCase):
+    def test_stops_on_total_pages(self):
+        endpoint = FakePaginatedEndpoint(100)
+        results = cloudflare_paginated_results(endpoint)
+        self.assertEqual(list(results), endpoint.items)
+        self.assertEqual(endpoint.pages_requested, [1, 2])
+
+    def test_stops_on_short_page_without_result_info(self):
+        endpoint = FakePaginatedEndpoint(60, with_result_info=False)
+        results = cloudflare_paginated_results(endpoint)
+        self.assertEqual(list(results), endpoint.items)
+        self.assertEqual(endpoint.pages_requested, [1, 2])
+
+    def test_total_count_requests_one_page(self):
+        endpoint = FakePaginatedEndpoint(420)
+        results = cloudflare_paginated_results(endpoint)
+        self.assertEqual(results.total_count(), 420)
+        self.assertEqual(endpoint.pages_requested, [1])
+
+    def test_total_count_requires_result_info(self):
+        endpoint = FakePaginatedEndpoint(10, with_result_info=False)
+        results = cloudflare_paginated_results(endpoint)
+        self.assertRaises(ValueError, results.total_count)
+
+
+class TestGetZonesFilters(TestCase, PatchMixin):
+    def setUp(self):
+        self.get_mock = self._patch(
+            'pycloudflare.services.CloudFlareService.get')
+
+    def test_passes_filters(self):
+        CloudFlareService('api_key', 'email').get_zones(
+            per_page=20, status='pending', account_id='account_id',
+            order='name')
+        self.get_mock.assert_called_once_with(
+            'zones?account.id=account_id&order=name&page=1&per_page=20'
+            '&status=pending')
+
+    def test_omits_unset_filters(self):
+        CloudFlareService('api_key', 'email').get_zones()
+        self.get_mock.assert_called_once_with('zones?page=1&per_page=50')
+
+
+class TestGetDNSRecordsFilters(TestCase, PatchMixin):
+    def setUp(self):
+        self.get_mock = self._patch(
+            'pycloudflare.services.CloudFlareService.get')
+
+    def test_passes_filters(self):
+        CloudFlareService('api_key', 'email').get_dns_records(
+            'zone_id', name='www.example.com', record_type='CNAME',
+            proxied=False)
+        self.get_mock.assert_called_once_with(
+            'zones/zone_id/dns_records?name=www.example.com&page=1'
+            '&per_page=50&proxied=false&type=CNAME')